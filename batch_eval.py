@@ -0,0 +1,210 @@
+"""Score many positions at once with NumPy, for offline jobs over large sets of positions.
+
+Run "python -m batch_eval" to compare its speed with evaluation.evaluate.
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Iterable, Union
+import numpy as np
+import board
+import evaluation
+
+SYMBOLS = ("P", "N", "B", "R", "Q", "K")
+# Piece codes used in encoded positions: 0 is an empty square,
+# 1 to 6 are the white pieces in the order of SYMBOLS and 7 to 12 the black ones.
+PIECE_CODES = {
+    (colour, symbol): offset + i + 1
+    for offset, colour in ((0, "w"), (6, "b"))
+    for i, symbol in enumerate(SYMBOLS)
+}
+FEN_CODES = {
+    (symbol if colour == "w" else symbol.lower()): code
+    for (colour, symbol), code in PIECE_CODES.items()
+}
+
+
+def _tables() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    mg = np.zeros((13, 64), dtype=np.int32)
+    eg = np.zeros((13, 64), dtype=np.int32)
+    phase = np.zeros(13, dtype=np.int32)
+    for (colour, symbol), code in PIECE_CODES.items():
+        scores = evaluation.SCORES[(colour, symbol)]
+        for sq in range(64):
+            mg[code, sq], eg[code, sq] = scores[sq & 7][(sq >> 3) + 1]
+        phase[code] = evaluation.PHASE_VALUES[symbol]
+    return mg, eg, phase
+
+
+# evaluation.SCORES as arrays indexed by piece code and square, a1 is 0 and h8 is 63.
+MG_TABLE, EG_TABLE, PHASE_TABLE = _tables()
+SQUARES = np.arange(64)
+
+
+def encode_boards(boards: Iterable[board.ChessBoard]) -> tuple[np.ndarray, np.ndarray]:
+    """Return the piece codes of boards as an (N, 64) array and who is to move,
+    as an (N,) array that is true for black.
+    """
+    boards = list(boards)
+    codes = np.zeros((len(boards), 64), dtype=np.int8)
+    black = np.zeros(len(boards), dtype=bool)
+    for i, chess_board in enumerate(boards):
+        for piece in chess_board.pieces:
+            codes[i, (piece.rank - 1) * 8 + piece.file] = PIECE_CODES[
+                (piece.colour, piece.symbol)
+            ]
+        black[i] = chess_board.turn == "b"
+    return codes, black
+
+
+def encode_fens(fens: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Like encode_boards but straight from FEN strings, without making any boards."""
+    fens = list(fens)
+    codes = np.zeros((len(fens), 64), dtype=np.int8)
+    black = np.zeros(len(fens), dtype=bool)
+    for i, fen in enumerate(fens):
+        placement, turn = fen.split(maxsplit=2)[:2]
+        sq = 56
+        for char in placement:
+            if char == "/":
+                sq -= 16
+            elif char.isdigit():
+                sq += int(char)
+            else:
+                codes[i, sq] = FEN_CODES[char]
+                sq += 1
+        black[i] = turn == "b"
+    return codes, black
+
+
+def planes(codes: np.ndarray) -> np.ndarray:
+    """Return encoded positions as an (N, 12, 64) array of ones where each piece type stands."""
+    return (codes[:, None, :] == np.arange(1, 13, dtype=np.int8)[None, :, None]).astype(
+        np.uint8
+    )
+
+
+def evaluate_batch(codes: np.ndarray, black: np.ndarray) -> np.ndarray:
+    """Return the scores of encoded positions for the side to move,
+    the same as evaluation.evaluate gives for each of them.
+    """
+    mg = MG_TABLE[codes, SQUARES].sum(axis=1)
+    eg = EG_TABLE[codes, SQUARES].sum(axis=1)
+    phase = np.minimum(PHASE_TABLE[codes].sum(axis=1), evaluation.MAX_PHASE)
+    score = (mg * phase + eg * (evaluation.MAX_PHASE - phase)) // evaluation.MAX_PHASE
+    return np.where(black, -score, score)
+
+
+def _shift(bb: np.ndarray, file_mod: int, rank_mod: int) -> np.ndarray:
+    """Move every square of an (N, 8, 8) rank by file array, dropping what goes off the board."""
+    shifted = np.zeros_like(bb)
+    ranks = slice(max(rank_mod, 0), 8 + min(rank_mod, 0))
+    files = slice(max(file_mod, 0), 8 + min(file_mod, 0))
+    from_ranks = slice(max(-rank_mod, 0), 8 + min(-rank_mod, 0))
+    from_files = slice(max(-file_mod, 0), 8 + min(-file_mod, 0))
+    shifted[:, ranks, files] = bb[:, from_ranks, from_files]
+    return shifted
+
+
+KNIGHT_JUMPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+
+
+def mobility(codes: np.ndarray) -> np.ndarray:
+    """Return an (N, 2) array counting the pseudo legal moves of the knights, bishops,
+    rooks and queens of white and black, a cheap stand in for how active each side is.
+    """
+    squares = codes.reshape(-1, 8, 8)
+    empty = squares == 0
+    counts = np.zeros((len(codes), 2), dtype=np.int32)
+    for side, offset in ((0, 0), (1, 6)):
+        own = (squares > offset) & (squares <= offset + 6)
+        knights = squares == offset + 2
+        for file_mod, rank_mod in KNIGHT_JUMPS:
+            counts[:, side] += (_shift(knights, file_mod, rank_mod) & ~own).sum(axis=(1, 2))
+        for symbols, directions in (
+            ((3, 5), BISHOP_DIRECTIONS),
+            ((4, 5), ROOK_DIRECTIONS),
+        ):
+            sliders = (squares == offset + symbols[0]) | (squares == offset + symbols[1])
+            for file_mod, rank_mod in directions:
+                ray = sliders
+                for _ in range(7):
+                    ray = _shift(ray, file_mod, rank_mod)
+                    counts[:, side] += (ray & ~own).sum(axis=(1, 2))
+                    ray = ray & empty
+                    if not ray.any():
+                        break
+    return counts
+
+
+def features(codes: np.ndarray, black: np.ndarray) -> np.ndarray:
+    """Return an (N, 15) array of simple features for encoded positions:
+    the count of each of the 12 piece types, the mobility of white and of black
+    and the evaluation for the side to move.
+    """
+    counts = planes(codes).sum(axis=2)
+    return np.concatenate(
+        [counts, mobility(codes), evaluate_batch(codes, black)[:, None]], axis=1
+    ).astype(np.int32)
+
+
+def random_fens(count: int, seed: int = 0, max_plies: int = 60) -> list[str]:
+    """Return FEN strings of positions from random games, for benchmarking."""
+    rng = random.Random(seed)
+    fens = []
+    while len(fens) < count:
+        chess_board = board.ChessBoard()
+        for _ in range(rng.randrange(max_plies)):
+            moves = chess_board.legal_moves()
+            if not moves:
+                break
+            chess_board.push(rng.choice(moves))
+        fens.append(chess_board.to_fen())
+    return fens
+
+
+def benchmark(fens: list[str], out=sys.stdout) -> dict[str, float]:
+    """Score the positions with evaluation.evaluate one board at a time and with evaluate_batch,
+    both starting from FEN strings, print the positions/sec of each and return them.
+    """
+    start = time.perf_counter()
+    scalar = [evaluation.evaluate(board.ChessBoard.from_fen(fen)) for fen in fens]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes, black = encode_fens(fens)
+    batch = evaluate_batch(codes, black)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    features(codes, black)
+    features_seconds = time.perf_counter() - start
+
+    if list(batch) != scalar:
+        raise ValueError("batch scores differ from evaluation.evaluate")
+    rates = {
+        "scalar": len(fens) / scalar_seconds,
+        "batch": len(fens) / batch_seconds,
+        "features": len(fens) / features_seconds,
+    }
+    for name, rate in rates.items():
+        print(f"{name:<9} {rate:>12.0f} positions/s", file=out)
+    print(f"batch speedup {rates['batch'] / rates['scalar']:.1f}x", file=out)
+    return rates
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="batch_eval", description="Compare batch and one at a time evaluation speed."
+    )
+    parser.add_argument("positions", type=int, nargs="?", default=2000)
+    args = parser.parse_args(argv)
+    benchmark(random_fens(args.positions))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,16 @@
-from typing import Union, cast
+from typing import Iterator, Union, cast
+import evaluation
 import pieces
-from chess_types import File, Rank, WhereType, ColourString
+import zobrist
+from chess_types import (
+    File,
+    Rank,
+    WhereType,
+    ColourString,
+    SymbolString,
+    BackendString,
+    StatusString,
+)
 
 ansi = "\33[0;30;{}m{}\33[0;0m"
 black_bg = "100"
@@ -17,6 +27,15 @@ STARTING_POSITIONS = (
 )
 files = a, b, c, d, e, f, g, h = cast(list[File], [0, 1, 2, 3, 4, 5, 6, 7])
 ranks = range(1,9)
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+FEN_PIECES: dict[str, type[pieces.ChessPiece]] = {
+    "r": pieces.Rook,
+    "n": pieces.Knight,
+    "b": pieces.Bishop,
+    "q": pieces.Queen,
+    "k": pieces.King,
+    "p": pieces.Pawn,
+}
 
 
 class ChessBoard(pieces.BaseBoard):
@@ -31,11 +50,27 @@ class ChessBoard(pieces.BaseBoard):
     The value on each square is either a ChessPiece or None.
 
     The "turn" attribute keeps track of which colour's turn it is.
+    "halfmove_clock" counts the moves since the last capture or pawn move
+    and "fullmove_number" the moves of the game, going up after every black move.
+    "history" holds the Zobrist key from before every move made, for finding repetitions,
+    and "status" is what game_status gave after the last move made with a piece's move method.
+    The "key" attribute is the Zobrist key of the position, see the zobrist module.
+    "mg", "eg" and "phase" are the running middlegame and endgame scores and game phase,
+    see the evaluation module.
+
+    The pieces are also indexed by colour in "by_colour",
+    by colour and symbol in "by_symbol" and the king of each colour in "kings".
+    These are kept up to date by make_move and unmake_move.
     """
 
     def __init__(self) -> None:
         self.turn: ColourString = "w"
         self.checkmate = False
+        self.status: StatusString = "ongoing"
+        self.en_passant: Union[None, tuple[File, Rank]] = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.history: list[int] = []
 
         #
         self.board: list[list[Union[None, pieces.ChessPiece]]] = [
@@ -43,6 +78,157 @@ class ChessBoard(pieces.BaseBoard):
         ]
         self.pieces = self.starting_pieces()
         self.starting_board()
+        self.set_up()
+
+    def set_up(self) -> None:
+        """Work out everything that follows from the pieces and flags,
+        once the board has been filled in: the indexes, the key and the running scores.
+        """
+        self.index_pieces()
+        self.key = zobrist.compute_key(self)
+        self.mg, self.eg, self.phase = evaluation.compute_scores(self)
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "ChessBoard":
+        """Return a board in the position of a FEN string.
+
+        The board is filled in straight from the string,
+        without setting up the starting position first.
+        The castling field sets the kings' castle_close and castle_far flags
+        and the rooks' positions, rights whose king or rook is not on its home square are dropped.
+        The move clocks are optional.
+        Raise ValueError for a string that is not a FEN or a position that can not happen,
+        like the side that just moved being in check.
+        """
+
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+        placement, turn, castling, en_passant = fields[:4]
+        rows = placement.split("/")
+        if len(rows) != 8 or turn not in ("w", "b"):
+            raise ValueError(f"invalid FEN: {fen!r}")
+        if castling != "-" and not set(castling) <= set("KQkq"):
+            raise ValueError(f"invalid FEN castling: {castling!r}")
+
+        chess_board = cls.__new__(cls)
+        chess_board.turn = cast(ColourString, turn)
+        chess_board.checkmate = False
+        chess_board.status = "ongoing"
+        chess_board.history = []
+        chess_board.board = [[None] * 9 for _ in range(8)]
+        chess_board.pieces = []
+        for row, rank_str in enumerate(rows):
+            rank = cast(Rank, 8 - row)
+            file = 0
+            for char in rank_str:
+                if char in "12345678":
+                    file += int(char)
+                    continue
+                if char.lower() not in FEN_PIECES or file > h:
+                    raise ValueError(f"invalid FEN placement: {placement!r}")
+                if char in "Pp" and rank in (1, 8):
+                    raise ValueError(f"FEN has a pawn on rank {rank}: {placement!r}")
+                colour: ColourString = "w" if char.isupper() else "b"
+                piece = FEN_PIECES[char.lower()](
+                    cast(File, file), rank, colour, chess_board
+                )
+                chess_board.pieces.append(piece)
+                chess_board.board[file][rank] = piece
+                file += 1
+            if file != 8:
+                raise ValueError(f"FEN rank {rank} is not 8 squares wide: {placement!r}")
+
+        kings = {piece.colour: piece for piece in chess_board.pieces if piece.symbol == "K"}
+        if len(kings) != 2 or sum(piece.symbol == "K" for piece in chess_board.pieces) != 2:
+            raise ValueError(f"FEN needs one king of each colour: {fen!r}")
+        for colour, close, far in (("w", "K", "Q"), ("b", "k", "q")):
+            king = cast(pieces.King, kings[colour])
+            home_rank = 1 if colour == "w" else 8
+            # castling rights only count with the king and the rook on their home squares
+            at_home = king.file == e and king.rank == home_rank
+            close_rook, far_rook = (
+                isinstance(rook, pieces.Rook) and rook.colour == colour
+                for rook in (chess_board.board[h][home_rank], chess_board.board[a][home_rank])
+            )
+            king.castle_close = close in castling and at_home and close_rook
+            king.castle_far = far in castling and at_home and far_rook
+        for piece in chess_board.pieces:
+            if isinstance(piece, pieces.Rook):
+                king = cast(pieces.King, kings[piece.colour])
+                home = piece.rank == (1 if piece.colour == "w" else 8)
+                if not (
+                    home
+                    and (
+                        piece.position == "close"
+                        and king.castle_close
+                        or piece.position == "far"
+                        and king.castle_far
+                    )
+                ):
+                    piece.position = None
+
+        chess_board.en_passant = None
+        if en_passant != "-":
+            # the square a pawn of the side that just moved skipped over
+            expected_rank = "6" if turn == "w" else "3"
+            if (
+                len(en_passant) != 2
+                or en_passant[0] not in "abcdefgh"
+                or en_passant[1] != expected_rank
+            ):
+                raise ValueError(f"invalid FEN en passant square: {en_passant!r}")
+            file = "abcdefgh".index(en_passant[0])
+            rank = int(en_passant[1])
+            # the pawn that moved two squares is just past the square, and it came from behind it
+            forward = -1 if turn == "w" else 1
+            pawn = chess_board.board[file][rank + forward]
+            if (
+                not isinstance(pawn, pieces.Pawn)
+                or pawn.colour == turn
+                or chess_board.board[file][rank]
+                or chess_board.board[file][rank - forward]
+            ):
+                raise ValueError(f"FEN en passant square {en_passant} has no pawn that skipped it")
+            chess_board.en_passant = (cast(File, file), cast(Rank, rank))
+        try:
+            chess_board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            chess_board.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"invalid FEN move clocks: {fen!r}") from None
+        chess_board.set_up()
+        if chess_board.is_check("b" if turn == "w" else "w"):
+            raise ValueError(f"FEN has the side that is not to move in check: {fen!r}")
+        return chess_board
+
+    def to_fen(self) -> str:
+        """Return the FEN string of the position."""
+
+        rows = []
+        for rank in reversed(ranks):
+            row = ""
+            empty = 0
+            for file in files:
+                piece = self.board[file][rank]
+                if not piece:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += piece.symbol if piece.colour == "w" else piece.symbol.lower()
+            rows.append(row + (str(empty) if empty else ""))
+
+        castling = ""
+        for colour, close, far in (("w", "K", "Q"), ("b", "k", "q")):
+            king = self.kings[colour]
+            castling += close if king.castle_close else ""
+            castling += far if king.castle_far else ""
+        en_passant = square_name(*self.en_passant) if self.en_passant else "-"
+        return (
+            f"{'/'.join(rows)} {self.turn} {castling or '-'} {en_passant} "
+            f"{self.halfmove_clock} {self.fullmove_number}"
+        )
 
     def starting_pieces(self) -> list[pieces.ChessPiece]:
         """Generate a list of ChessPiece's in their starting positions."""
@@ -58,15 +244,37 @@ class ChessBoard(pieces.BaseBoard):
 
     def starting_board(self):
         """Add all the starting pieces onto the board."""
-        for file in range(8):
-            for rank in range(1, 9):
-                piece_set = False
-                for piece in self.pieces:
-                    if piece.file == file and piece.rank == rank:
-                        self.board[file][rank] = piece
-                        piece_set = True
-                if not piece_set:
-                    self.board[file][rank] = None
+        for piece in self.pieces:
+            self.board[piece.file][piece.rank] = piece
+
+    def index_pieces(self) -> None:
+        """Build the piece indexes from the "pieces" list."""
+        self.by_colour: dict[ColourString, dict[pieces.ChessPiece, None]] = {
+            "w": {},
+            "b": {},
+        }
+        self.by_symbol: dict[
+            tuple[ColourString, SymbolString], dict[pieces.ChessPiece, None]
+        ] = {
+            (colour, symbol): {}
+            for colour in ("w", "b")
+            for symbol in ("R", "N", "B", "Q", "K", "P")
+        }
+        self.kings: dict[ColourString, pieces.King] = {}
+        for piece in self.pieces:
+            self.add_index(piece)
+
+    def add_index(self, piece: pieces.ChessPiece) -> None:
+        self.by_colour[piece.colour][piece] = None
+        self.by_symbol[(piece.colour, piece.symbol)][piece] = None
+        if isinstance(piece, pieces.King):
+            self.kings[piece.colour] = piece
+
+    def remove_index(self, piece: pieces.ChessPiece) -> None:
+        del self.by_colour[piece.colour][piece]
+        del self.by_symbol[(piece.colour, piece.symbol)][piece]
+        if self.kings.get(piece.colour) is piece:
+            del self.kings[piece.colour]
 
     def get_pieces(self, where: WhereType) -> list[pieces.ChessPiece]:
         """Return a list of pieces that have the certain attributes in the "where" dict.
@@ -78,17 +286,31 @@ class ChessBoard(pieces.BaseBoard):
         "rank" which is a int of type Rank or None,
         """
 
-        wanted_pieces = []
-        for piece in self.pieces:
-            equal = (
-                ((piece.colour == where["colour"]) or not where["colour"])
-                and ((piece.symbol == where["symbol"]) or not where["symbol"])
-                and ((piece.file == where["file"]) or not where["file"])
-                and ((piece.rank == where["rank"]) or not where["rank"])
-            )
-            if equal:
-                wanted_pieces.append(piece)
-        return wanted_pieces
+        colour, symbol = where["colour"], where["symbol"]
+        file, rank = where["file"], where["rank"]
+        if file is not None and rank is not None:
+            piece = self.board[file][rank]
+            candidates = [piece] if piece else []
+        elif colour and symbol:
+            candidates = self.by_symbol[(colour, symbol)]
+        elif colour:
+            candidates = self.by_colour[colour]
+        elif symbol:
+            candidates = [
+                *self.by_symbol[("w", symbol)],
+                *self.by_symbol[("b", symbol)],
+            ]
+        else:
+            candidates = self.pieces
+
+        return [
+            piece
+            for piece in candidates
+            if (not colour or piece.colour == colour)
+            and (not symbol or piece.symbol == symbol)
+            and (file is None or piece.file == file)
+            and (rank is None or piece.rank == rank)
+        ]
 
     def get_piece(self, where: WhereType) -> Union[pieces.ChessPiece, None]:
         """Return a the first piece that has the certain attributes in the "where" dict.
@@ -100,15 +322,14 @@ class ChessBoard(pieces.BaseBoard):
         "rank" which is a int of type Rank or None,
         """
 
-        for piece in self.pieces:
-            equal = (
-                ((piece.colour == where["colour"]) or not where["colour"])
-                and ((piece.symbol == where["symbol"]) or not where["symbol"])
-                and ((piece.rank == where["rank"]) or not where["rank"])
-                and ((piece.file == where["file"]) or not where["file"])
-            )
-            if equal:
-                return piece
+        if where["symbol"] == "K" and where["colour"]:
+            king = self.kings.get(where["colour"])
+            if king and (where["file"] is None or king.file == where["file"]):
+                if where["rank"] is None or king.rank == where["rank"]:
+                    return king
+            return None
+        found = self.get_pieces(where)
+        return found[0] if found else None
 
     def is_check(
         self,
@@ -119,67 +340,489 @@ class ChessBoard(pieces.BaseBoard):
         or if position is check for a specific move and colour.
         """
 
-        other = self.copy()
-
-        if move:
-            other.board[move[0].file][move[0].rank] = None
-            piece = move[0].copy()
-            piece.board = other
-            piece.file = move[1]
-            piece.rank = move[2]
-            other.board[move[1]][move[2]] = piece
-            for p in other.pieces:
-                if p.file == move[0].file and p.rank == move[0].rank:
-                    other.pieces[other.pieces.index(p)] = piece
-
-        king = cast(
-            pieces.King,
-            other.get_piece(
-                {"colour": colour, "symbol": "K", "rank": None, "file": None}
-            ),
-        )
+        undo = self.make_move(*move) if move else None
 
-        opposite_pieces = other.get_pieces(
-            {
-                "colour": "b" if colour == "w" else "w",
-                "symbol": None,
-                "rank": None,
-                "file": None,
-            }
+        king = self.kings[colour]
+        in_check = self.is_square_attacked(
+            king.file, king.rank, "b" if colour == "w" else "w"
         )
 
-        for piece in opposite_pieces:
-            allowed = piece.allowed_moves(check=False)
-            if (king.file, king.rank) in allowed:
+        if undo:
+            self.unmake_move(undo)
+        return in_check
+
+    def is_square_attacked(self, file: int, rank: int, by_colour: ColourString) -> bool:
+        """Return if any piece of "by_colour" attacks the square at the file and rank.
+
+        Instead of generating the moves of every piece,
+        this looks outwards from the square for a knight, king or pawn that could jump to it
+        and along every ray for the first piece, which attacks it if it is a matching slider.
+        """
+
+        for jump_file, jump_rank in pieces.KNIGHT_JUMPS[file][rank]:
+            piece = self.board[jump_file][jump_rank]
+            if piece and piece.symbol == "N" and piece.colour == by_colour:
+                return True
+        for jump_file, jump_rank in pieces.KING_JUMPS[file][rank]:
+            piece = self.board[jump_file][jump_rank]
+            if piece and piece.symbol == "K" and piece.colour == by_colour:
                 return True
+
+        pawn_rank = rank - (1 if by_colour == "w" else -1)
+        if 1 <= pawn_rank <= 8:
+            for pawn_file in (file - 1, file + 1):
+                piece = a <= pawn_file <= h and self.board[pawn_file][pawn_rank]
+                if piece and piece.symbol == "P" and piece.colour == by_colour:
+                    return True
+
+        rays = pieces.RAYS[file][rank]
+        for line in pieces.DIRECTIONS:
+            sliders = "RQ" if line in pieces.ROOK_DIRECTIONS else "BQ"
+            for ray_file, ray_rank in rays[line]:
+                piece = self.board[ray_file][ray_rank]
+                if piece:
+                    if piece.colour == by_colour and piece.symbol in sliders:
+                        return True
+                    break
         return False
 
+    def square_attackers(
+        self,
+        file: int,
+        rank: int,
+        colour: ColourString,
+        ignore: Union[None, set[pieces.ChessPiece]] = None,
+    ) -> list[pieces.ChessPiece]:
+        """Return every piece of a colour that attacks the square at the file and rank.
+
+        Pieces in "ignore" are treated as if they were off the board,
+        so sliders behind them are found, which is what an exchange on the square needs.
+        """
+
+        ignore = ignore or set()
+        found = []
+        for jumps, symbol in (
+            (pieces.KNIGHT_JUMPS[file][rank], "N"),
+            (pieces.KING_JUMPS[file][rank], "K"),
+        ):
+            for jump_file, jump_rank in jumps:
+                piece = self.board[jump_file][jump_rank]
+                if (
+                    piece
+                    and piece.symbol == symbol
+                    and piece.colour == colour
+                    and piece not in ignore
+                ):
+                    found.append(piece)
+
+        pawn_rank = rank - (1 if colour == "w" else -1)
+        if 1 <= pawn_rank <= 8:
+            for pawn_file in (file - 1, file + 1):
+                piece = a <= pawn_file <= h and self.board[pawn_file][pawn_rank]
+                if (
+                    piece
+                    and piece.symbol == "P"
+                    and piece.colour == colour
+                    and piece not in ignore
+                ):
+                    found.append(piece)
+
+        rays = pieces.RAYS[file][rank]
+        for line in pieces.DIRECTIONS:
+            sliders = "RQ" if line in pieces.ROOK_DIRECTIONS else "BQ"
+            for ray_file, ray_rank in rays[line]:
+                piece = self.board[ray_file][ray_rank]
+                if piece and piece not in ignore:
+                    if piece.colour == colour and piece.symbol in sliders:
+                        found.append(piece)
+                    break
+        return found
+
+    def _castling(self) -> tuple[bool, bool, bool, bool]:
+        """Return the castling flags of both kings, white first."""
+        flags = []
+        for colour in ("w", "b"):
+            king = self.kings.get(colour)
+            if king:
+                flags += [king.castle_close, king.castle_far]
+            else:
+                flags += [False, False]
+        return cast(tuple[bool, bool, bool, bool], tuple(flags))
+
+    def _set_castling(self, flags: tuple[bool, bool, bool, bool]) -> None:
+        for i, colour in enumerate(("w", "b")):
+            king = self.kings.get(colour)
+            if king:
+                king.castle_close, king.castle_far = flags[2 * i], flags[2 * i + 1]
+
+    def make_move(
+        self,
+        piece: pieces.ChessPiece,
+        file: File,
+        rank: Rank,
+        promotion: Union[None, SymbolString] = None,
+    ) -> pieces.Undo:
+        """Move a piece on this board in place and return what is needed to undo it.
+
+        The move is not checked for legality and the turn is not changed.
+        A captured piece, including one taken en passant, is taken off the board and out of "pieces".
+        A king moving two squares castles, bringing the rook with it.
+        A pawn reaching the last rank is replaced by a piece of the "promotion" symbol, a queen by default.
+        Moving a rook or a king, or capturing a rook, clears the castling flags it affects.
+        The Zobrist "key" is updated by XORing out what changed
+        and the running scores by taking off and adding the scores of the pieces that moved.
+        """
+
+        self.history.append(self.key)
+        key = self.key ^ zobrist.piece_key(piece)
+        mg, eg = evaluation.piece_score(piece)
+        mg, eg, phase = self.mg - mg, self.eg - eg, self.phase
+        captured = self.board[file][rank]
+        if isinstance(piece, pieces.Pawn) and not captured and file != piece.file:
+            captured = self.board[file][piece.rank]
+        captured_index = -1
+        if captured:
+            captured_index = self.pieces.index(captured)
+            del self.pieces[captured_index]
+            self.remove_index(captured)
+            self.board[captured.file][captured.rank] = None
+            key ^= zobrist.piece_key(captured)
+            captured_mg, captured_eg = evaluation.piece_score(captured)
+            mg -= captured_mg
+            eg -= captured_eg
+            phase -= evaluation.PHASE_VALUES[captured.symbol]
+        undo = pieces.Undo(
+            piece,
+            piece.file,
+            piece.rank,
+            captured,
+            captured_index,
+            self._castling(),
+            getattr(piece, "position", None),
+            self.en_passant,
+            None,
+            self.key,
+            (self.mg, self.eg, self.phase),
+            (self.halfmove_clock, self.fullmove_number),
+        )
+
+        self.board[piece.file][piece.rank] = None
+        self.board[file][rank] = piece
+        piece.file = file
+        piece.rank = rank
+
+        if captured or isinstance(piece, pieces.Pawn):
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if piece.colour == "b":
+            self.fullmove_number += 1
+
+        self.en_passant = None
+        if isinstance(piece, pieces.King):
+            castle = pieces.castle_rook(undo.file, file)
+            if castle:
+                rook = cast(pieces.Rook, self.board[castle[0]][rank])
+                key ^= zobrist.piece_key(rook)
+                rook_mg, rook_eg = evaluation.piece_score(rook)
+                self.board[castle[0]][rank] = None
+                self.board[castle[1]][rank] = rook
+                rook.file = castle[1]
+                key ^= zobrist.piece_key(rook)
+                rook_to_mg, rook_to_eg = evaluation.piece_score(rook)
+                mg += rook_to_mg - rook_mg
+                eg += rook_to_eg - rook_eg
+        elif isinstance(piece, pieces.Pawn):
+            if abs(rank - undo.rank) == 2:
+                self.en_passant = (file, cast(Rank, (rank + undo.rank) // 2))
+            elif rank == 1 or rank == 8:
+                promoted = pieces.PROMOTIONS[promotion or "Q"](
+                    file, rank, piece.colour, self
+                )
+                if isinstance(promoted, pieces.Rook):
+                    promoted.position = None
+                self.pieces[self.pieces.index(piece)] = promoted
+                self.remove_index(piece)
+                self.add_index(promoted)
+                self.board[file][rank] = promoted
+                phase += evaluation.PHASE_VALUES[promoted.symbol]
+                undo = undo._replace(promoted=promoted)
+
+        for moved in (piece, captured):
+            if isinstance(moved, pieces.King):
+                moved.castle_close = moved.castle_far = False
+            elif isinstance(moved, pieces.Rook) and moved.position:
+                king = self.kings.get(moved.colour)
+                if king and moved.position == "close":
+                    king.castle_close = False
+                elif king and moved.position == "far":
+                    king.castle_far = False
+                if moved is piece:
+                    moved.position = None
+
+        moved = cast(pieces.ChessPiece, self.board[file][rank])
+        key ^= zobrist.piece_key(moved)
+        moved_mg, moved_eg = evaluation.piece_score(moved)
+        self.mg, self.eg, self.phase = mg + moved_mg, eg + moved_eg, phase
+        key ^= zobrist.castling_key(undo.castling) ^ zobrist.castling_key(
+            self._castling()
+        )
+        key ^= zobrist.en_passant_key(undo.en_passant) ^ zobrist.en_passant_key(
+            self.en_passant
+        )
+        self.key = key
+        return undo
+
+    def unmake_move(self, undo: pieces.Undo) -> None:
+        """Take back a move made with make_move, restoring the board exactly."""
+
+        piece = undo.piece
+        if undo.promoted:
+            self.pieces[self.pieces.index(undo.promoted)] = piece
+            self.remove_index(undo.promoted)
+            self.add_index(piece)
+        self.board[piece.file][piece.rank] = None
+        if isinstance(piece, pieces.King):
+            castle = pieces.castle_rook(undo.file, piece.file)
+            if castle:
+                rook = cast(pieces.Rook, self.board[castle[1]][piece.rank])
+                self.board[castle[1]][piece.rank] = None
+                self.board[castle[0]][piece.rank] = rook
+                rook.file = castle[0]
+        self.board[undo.file][undo.rank] = piece
+        piece.file = undo.file
+        piece.rank = undo.rank
+        if undo.captured:
+            self.board[undo.captured.file][undo.captured.rank] = undo.captured
+            self.pieces.insert(undo.captured_index, undo.captured)
+            self.add_index(undo.captured)
+        if isinstance(piece, pieces.Rook):
+            piece.position = undo.position
+        self.en_passant = undo.en_passant
+        self._set_castling(undo.castling)
+        self.key = undo.key
+        self.mg, self.eg, self.phase = undo.scores
+        self.halfmove_clock, self.fullmove_number = undo.clocks
+        self.history.pop()
+
+    def push(self, move: pieces.Move) -> pieces.Undo:
+        """Play a move with make_move and give the turn to the other colour.
+
+        Unlike the move method on the pieces this does not check the move or look for checkmate,
+        which makes it the way to walk through positions, together with pop.
+        """
+        undo = self.make_move(*move)
+        self.turn = "b" if self.turn == "w" else "w"
+        self.key ^= zobrist.SIDE_KEY
+        return undo
+
+    def pop(self, undo: pieces.Undo) -> None:
+        """Take back a move played with push."""
+        self.turn = "b" if self.turn == "w" else "w"
+        self.unmake_move(undo)
+
+    def checks_and_pins(
+        self, colour: ColourString
+    ) -> tuple[
+        list[pieces.ChessPiece],
+        set[tuple[int, int]],
+        dict[pieces.ChessPiece, tuple[int, int]],
+    ]:
+        """Return what is checking the king of a colour and what is pinned to it.
+
+        This is a list of the pieces giving check,
+        the squares a piece can move to to stop a single check, by capturing or blocking it,
+        and a dict of the pinned pieces with the direction from the king they are pinned in.
+        """
+
+        king = self.kings[colour]
+        other = "b" if colour == "w" else "w"
+        checkers: list[pieces.ChessPiece] = []
+        block: set[tuple[int, int]] = set()
+        pins: dict[pieces.ChessPiece, tuple[int, int]] = {}
+
+        for line in pieces.DIRECTIONS:
+            sliders = "RQ" if line in pieces.ROOK_DIRECTIONS else "BQ"
+            pinned = None
+            between = []
+            for file, rank in pieces.RAYS[king.file][king.rank][line]:
+                on_square = self.board[file][rank]
+                if not on_square:
+                    between.append((file, rank))
+                    continue
+                if on_square.colour == colour:
+                    if pinned:
+                        break
+                    pinned = on_square
+                    continue
+                if on_square.symbol in sliders:
+                    if pinned:
+                        pins[pinned] = line
+                    else:
+                        checkers.append(on_square)
+                        block.update(between)
+                        block.add((file, rank))
+                break
+
+        for file, rank in pieces.KNIGHT_JUMPS[king.file][king.rank]:
+            on_square = self.board[file][rank]
+            if on_square and on_square.colour == other and on_square.symbol == "N":
+                checkers.append(on_square)
+                block.add((file, rank))
+
+        rank = king.rank + (1 if colour == "w" else -1)
+        if 1 <= rank <= 8:
+            for file in (king.file - 1, king.file + 1):
+                on_square = a <= file <= h and self.board[file][rank]
+                if on_square and on_square.colour == other and on_square.symbol == "P":
+                    checkers.append(on_square)
+                    block.add((file, rank))
+
+        return checkers, block, pins
+
+    def pseudo_moves(self, piece: pieces.ChessPiece) -> list[tuple[File, Rank]]:
+        """Return the moves of a piece without looking at checks, or castling."""
+        return piece.allowed_moves(check=False)
+
+    def generate_moves(
+        self,
+        colour: Union[None, ColourString] = None,
+        captures: bool = True,
+        quiets: bool = True,
+        only: Union[None, pieces.ChessPiece] = None,
+    ) -> Iterator[pieces.Move]:
+        """Yield the legal moves of a colour, the side to move by default, one at a time.
+
+        The pieces giving check and the pinned pieces are worked out once,
+        so only king moves and en passant captures are tried out on the board.
+        A pawn reaching the last rank gives a move for each piece it can promote to.
+        Captures, en passant and promotions only come if "captures" is true,
+        the other moves, castling included, only if "quiets" is true,
+        and "only" keeps to the moves of one piece.
+
+        Moves are worked out a piece at a time as they are asked for,
+        so stopping early skips the pieces that were not reached.
+        The board can be changed between moves as long as it is put back.
+        """
+
+        colour = colour or self.turn
+        king = self.kings[colour]
+        checkers, block, pins = self.checks_and_pins(colour)
+
+        if len(checkers) < 2:
+            for piece in list(self.by_colour[colour]):
+                if piece is king or only and piece is not only:
+                    continue
+                pin = pins.get(piece)
+                is_pawn = piece.symbol == "P"
+                for file, rank in self.pseudo_moves(piece):
+                    en_passant = is_pawn and file != piece.file and not self.board[file][rank]
+                    promotion = is_pawn and (rank == 1 or rank == 8)
+                    if not (
+                        captures
+                        if self.board[file][rank] or en_passant or promotion
+                        else quiets
+                    ):
+                        continue
+                    if en_passant:
+                        # en passant takes a piece off another square, so just try it
+                        if not self.is_check(colour, (piece, file, rank)):
+                            yield pieces.Move(piece, file, rank)
+                        continue
+                    if pin and pieces.direction(king.file, king.rank, file, rank) != pin:
+                        continue
+                    if checkers and (file, rank) not in block:
+                        continue
+                    if promotion:
+                        for symbol in pieces.PROMOTIONS:
+                            yield pieces.Move(piece, file, rank, symbol)
+                    else:
+                        yield pieces.Move(piece, file, rank)
+
+        if only and only is not king:
+            return
+        for file, rank in self.pseudo_moves(king):
+            if not (captures if self.board[file][rank] else quiets):
+                continue
+            if not self.is_check(colour, (king, file, rank)):
+                yield pieces.Move(king, file, rank)
+        if quiets and not checkers:
+            for file, rank in king.castle_moves():
+                yield pieces.Move(king, file, rank)
+
+    def legal_moves(self, colour: Union[None, ColourString] = None) -> list[pieces.Move]:
+        """Return every legal move of a colour, the side to move by default."""
+        return list(self.generate_moves(colour))
+
+    def has_legal_move(self, colour: Union[None, ColourString] = None) -> bool:
+        """Return if a colour has any legal move, stopping at the first one found."""
+        return next(self.generate_moves(colour), None) is not None
+
+    def is_legal(self, move: pieces.Move) -> bool:
+        """Return if a move, like one from the transposition table, is legal for the side to move."""
+        piece = move.piece
+        if piece.colour != self.turn or self.board[piece.file][piece.rank] is not piece:
+            return False
+        return move in self.generate_moves(only=piece)
+
     def change_turn(self) -> None:
         self.turn = "b" if self.turn == "w" else "w"
-        in_check = self.is_check(self.turn)
-        if in_check:
-            self.checkmate = True
-            for piece in self.get_pieces(
-                {"colour": self.turn, "file": None, "rank": None, "symbol": None}
-            ):
-                for move in piece.allowed_moves():
-                    if not self.is_check(self.turn, (piece, *move)):
-                        self.checkmate = False
+        self.key ^= zobrist.SIDE_KEY
+        self.status = self.game_status()
+        self.checkmate = self.status == "checkmate"
+
+    def repetitions(self) -> int:
+        """Return how many times the current position came up before in the game.
+
+        Positions can only repeat since the last capture or pawn move,
+        so only the keys of the last "halfmove_clock" moves are looked at,
+        and only every other one, where the same colour was to move.
+        """
+        count = 0
+        history = self.history
+        for i in range(2, min(self.halfmove_clock, len(history)) + 1, 2):
+            if history[-i] == self.key:
+                count += 1
+        return count
+
+    def game_status(self) -> StatusString:
+        """Return if the game is over for the side to move and why, or "ongoing".
+
+        Draws by threefold repetition and the fifty move rule are given as soon as they can be claimed.
+        """
+        if not self.has_legal_move():
+            return "checkmate" if self.is_check(self.turn) else "stalemate"
+        if self.halfmove_clock >= 100:
+            return "fifty_moves"
+        if self.repetitions() >= 2:
+            return "repetition"
+        return "ongoing"
 
     def copy(self):
         """Return a copy of this instance of ChessBoard.
 
         Values can be changed without affecting the board it was copied from.
+        The copy is made without setting up the starting position first,
+        only the pieces of this board are copied over.
         """
-        copy_board = ChessBoard()
+        copy_board = type(self).__new__(type(self))
         copy_board.board = [[None] * 9 for _ in range(8)]
+        copy_board.pieces = []
         for piece in self.pieces:
             new_piece = piece.copy()
             new_piece.board = copy_board
             copy_board.pieces.append(new_piece)
-        for piece in copy_board.pieces:
-            copy_board.board[piece.file][piece.rank] = piece
+            copy_board.board[piece.file][piece.rank] = new_piece
+        copy_board.index_pieces()
         copy_board.turn = self.turn
+        copy_board.checkmate = self.checkmate
+        copy_board.status = self.status
+        copy_board.history = list(self.history)
+        copy_board.en_passant = self.en_passant
+        copy_board.key = self.key
+        copy_board.mg, copy_board.eg, copy_board.phase = self.mg, self.eg, self.phase
+        copy_board.halfmove_clock = self.halfmove_clock
+        copy_board.fullmove_number = self.fullmove_number
         return copy_board
 
     def __str__(self) -> str:
@@ -201,3 +844,81 @@ class ChessBoard(pieces.BaseBoard):
                         ) + ansi.format(bg_ansi, " ")
             board_str += "\n"
         return board_str
+
+
+def square_name(file: int, rank: int) -> str:
+    """Return the name of a square, like "e4"."""
+    return "abcdefgh"[file] + str(rank)
+
+
+def move_name(move: pieces.Move) -> str:
+    """Return a move in long algebraic notation, like "e2e4" or "e7e8q".
+
+    This has to be called before the move is made, while the piece is still on its square.
+    """
+    name = square_name(move.piece.file, move.piece.rank) + square_name(
+        move.file, move.rank
+    )
+    if move.promotion:
+        name += move.promotion.lower()
+    return name
+
+
+def parse_move(chess_board: ChessBoard, name: str) -> Union[None, pieces.Move]:
+    """Return the legal move of a board with a name from move_name, or None if there is none."""
+    for move in chess_board.legal_moves():
+        if move_name(move) == name.lower():
+            return move
+    return None
+
+
+PROMOTION_CODES: tuple[Union[None, SymbolString], ...] = (None, "N", "B", "R", "Q")
+
+
+def encode_move(move: pieces.Move) -> int:
+    """Return a move packed into 16 bits.
+
+    The lowest 6 bits are the square the piece is on, the next 6 the square it moves to,
+    both numbered from 0 for a1 to 63 for h8, and the next 3 the index of the promotion
+    in PROMOTION_CODES. 0 is never a move, so it can be used for no move.
+    Like move_name, this has to be called before the move is made.
+    """
+    from_square = (move.piece.rank - 1) * 8 + move.piece.file
+    to_square = (move.rank - 1) * 8 + move.file
+    return from_square | to_square << 6 | PROMOTION_CODES.index(move.promotion) << 12
+
+
+def decode_move(chess_board: ChessBoard, code: int) -> Union[None, pieces.Move]:
+    """Return the move a code from encode_move stands for on a board.
+
+    This is None if there is no piece on the square it moves from,
+    it is not checked that the move is legal.
+    """
+    if not code:
+        return None
+    piece = chess_board.board[code & 7][(code >> 3 & 7) + 1]
+    if not piece:
+        return None
+    return pieces.Move(
+        piece,
+        cast(File, code >> 6 & 7),
+        cast(Rank, (code >> 9 & 7) + 1),
+        PROMOTION_CODES[code >> 12 & 7],
+    )
+
+
+def new_board(
+    backend: BackendString = "list", fen: Union[None, str] = None
+) -> ChessBoard:
+    """Return a board stored by the chosen backend,
+    in the position of a FEN string or else the starting position.
+
+    "list" gives a ChessBoard and "bitboard" gives a bitboard.BitBoard.
+    """
+    board_class = ChessBoard
+    if backend == "bitboard":
+        # imported here because bitboard builds on this module
+        import bitboard
+
+        board_class = bitboard.BitBoard
+    return board_class.from_fen(fen) if fen else board_class()
@@ -4,6 +4,8 @@ File = Literal[0, 1, 2, 3, 4, 5, 6, 7]
 Rank = Literal[1, 2, 3, 4, 5, 6, 7, 8]
 ColourString = Literal["w", "b"]
 SymbolString = Literal["R", "N", "B", "Q", "K", "P"]
+BackendString = Literal["list", "bitboard"]
+StatusString = Literal["ongoing", "checkmate", "stalemate", "repetition", "fifty_moves"]
 WhereType = TypedDict(
     "WhereType",
     {
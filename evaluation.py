@@ -0,0 +1,170 @@
+from typing import cast
+import pieces
+from chess_types import ColourString, SymbolString
+
+# Piece values in centipawns for the middlegame and the endgame.
+MG_VALUES: dict[SymbolString, int] = {"P": 100, "N": 320, "B": 330, "R": 500, "Q": 900, "K": 0}
+EG_VALUES: dict[SymbolString, int] = {"P": 120, "N": 300, "B": 320, "R": 520, "Q": 920, "K": 0}
+
+# How much each piece counts towards the game phase,
+# with all of them on the board the phase is MAX_PHASE, the middlegame.
+PHASE_VALUES: dict[SymbolString, int] = {"P": 0, "N": 1, "B": 1, "R": 2, "Q": 4, "K": 0}
+MAX_PHASE = 24
+
+# Piece-square tables from white's point of view, written with rank 8 at the top.
+# fmt: off
+PAWN_MG = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+)
+PAWN_EG = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+    80,  80,  80,  80,  80,  80,  80,  80,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    30,  30,  30,  30,  30,  30,  30,  30,
+    15,  15,  15,  15,  15,  15,  15,  15,
+     5,   5,   5,   5,   5,   5,   5,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+     0,   0,   0,   0,   0,   0,   0,   0,
+)
+KNIGHT = (
+   -50, -40, -30, -30, -30, -30, -40, -50,
+   -40, -20,   0,   0,   0,   0, -20, -40,
+   -30,   0,  10,  15,  15,  10,   0, -30,
+   -30,   5,  15,  20,  20,  15,   5, -30,
+   -30,   0,  15,  20,  20,  15,   0, -30,
+   -30,   5,  10,  15,  15,  10,   5, -30,
+   -40, -20,   0,   5,   5,   0, -20, -40,
+   -50, -40, -30, -30, -30, -30, -40, -50,
+)
+BISHOP = (
+   -20, -10, -10, -10, -10, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,  10,  10,   5,   0, -10,
+   -10,   5,   5,  10,  10,   5,   5, -10,
+   -10,   0,  10,  10,  10,  10,   0, -10,
+   -10,  10,  10,  10,  10,  10,  10, -10,
+   -10,   5,   0,   0,   0,   0,   5, -10,
+   -20, -10, -10, -10, -10, -10, -10, -20,
+)
+ROOK = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+)
+QUEEN = (
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,   5,   5,   5,   0, -10,
+    -5,   0,   5,   5,   5,   5,   0,  -5,
+     0,   0,   5,   5,   5,   5,   0,  -5,
+   -10,   5,   5,   5,   5,   5,   0, -10,
+   -10,   0,   5,   0,   0,   0,   0, -10,
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+KING_MG = (
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -20, -30, -30, -40, -40, -30, -30, -20,
+   -10, -20, -20, -20, -20, -20, -20, -10,
+    20,  20,   0,   0,   0,   0,  20,  20,
+    20,  30,  10,   0,   0,  10,  30,  20,
+)
+KING_EG = (
+   -50, -40, -30, -20, -20, -30, -40, -50,
+   -30, -20, -10,   0,   0, -10, -20, -30,
+   -30, -10,  20,  30,  30,  20, -10, -30,
+   -30, -10,  30,  40,  40,  30, -10, -30,
+   -30, -10,  30,  40,  40,  30, -10, -30,
+   -30, -10,  20,  30,  30,  20, -10, -30,
+   -30, -30,   0,   0,   0,   0, -30, -30,
+   -50, -30, -30, -30, -30, -30, -30, -50,
+)
+# fmt: on
+
+TABLES: dict[SymbolString, tuple[tuple[int, ...], tuple[int, ...]]] = {
+    "P": (PAWN_MG, PAWN_EG),
+    "N": (KNIGHT, KNIGHT),
+    "B": (BISHOP, BISHOP),
+    "R": (ROOK, ROOK),
+    "Q": (QUEEN, QUEEN),
+    "K": (KING_MG, KING_EG),
+}
+
+
+def table_index(colour: ColourString, file: int, rank: int) -> int:
+    """Return the index into a piece-square table of a square for a colour."""
+    if colour == "w":
+        return (8 - rank) * 8 + file
+    return (rank - 1) * 8 + file
+
+
+def _score_table(
+    colour: ColourString, symbol: SymbolString
+) -> list[list[tuple[int, int]]]:
+    mg_table, eg_table = TABLES[symbol]
+    sign = 1 if colour == "w" else -1
+    table = [[(0, 0)] * 9 for _ in range(8)]
+    for file in range(8):
+        for rank in range(1, 9):
+            index = table_index(colour, file, rank)
+            table[file][rank] = (
+                sign * (MG_VALUES[symbol] + mg_table[index]),
+                sign * (EG_VALUES[symbol] + eg_table[index]),
+            )
+    return table
+
+
+# The middlegame and endgame score of every piece on every square,
+# indexed by colour and symbol, then file and rank like the board.
+# Black pieces have negative scores, so the scores of a board are white's.
+SCORES = {
+    (colour, symbol): _score_table(cast(ColourString, colour), cast(SymbolString, symbol))
+    for colour in ("w", "b")
+    for symbol in ("P", "N", "B", "R", "Q", "K")
+}
+
+
+def piece_score(piece: pieces.ChessPiece) -> tuple[int, int]:
+    """Return the middlegame and endgame score of a piece on its square."""
+    return SCORES[(piece.colour, piece.symbol)][piece.file][piece.rank]
+
+
+def compute_scores(board: pieces.BaseBoard) -> tuple[int, int, int]:
+    """Return the middlegame score, endgame score and phase of a board from scratch.
+
+    Boards keep these up to date as moves are made in "mg", "eg" and "phase",
+    this is for setting them up.
+    """
+    mg = eg = phase = 0
+    for piece in board.pieces:
+        piece_mg, piece_eg = piece_score(piece)
+        mg += piece_mg
+        eg += piece_eg
+        phase += PHASE_VALUES[piece.symbol]
+    return mg, eg, phase
+
+
+def evaluate(board: pieces.BaseBoard) -> int:
+    """Return the score of a board in centipawns for the side to move.
+
+    The middlegame and endgame scores are blended by the phase,
+    so the endgame score takes over as pieces come off the board.
+    This only reads the running scores of the board, so it takes the same time for any position.
+    """
+    phase = min(board.phase, MAX_PHASE)
+    score = (board.mg * phase + board.eg * (MAX_PHASE - phase)) // MAX_PHASE
+    return score if board.turn == "w" else -score
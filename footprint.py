@@ -0,0 +1,72 @@
+"""Measure how much memory boards take and how long it takes to copy them.
+
+Run "python -m footprint" to see the numbers for a few positions.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Union
+import board
+import perft
+from chess_types import BackendString
+
+
+def board_bytes(chess_board: board.ChessBoard, count: int = 200) -> int:
+    """Return the memory taken by one copy of a board in bytes,
+    averaged over "count" copies that are kept alive at the same time.
+    """
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        copies = [chess_board.copy() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del copies
+    return (after - before) // count
+
+
+def copy_seconds(chess_board: board.ChessBoard, count: int = 2000) -> float:
+    """Return how many seconds one copy of a board takes, averaged over "count" copies."""
+    start = time.perf_counter()
+    for _ in range(count):
+        chess_board.copy()
+    return (time.perf_counter() - start) / count
+
+
+def measure(
+    backend: BackendString = "list", out=sys.stdout
+) -> list[tuple[str, int, float]]:
+    """Measure the bytes per board and microseconds per copy of each of perft.POSITIONS.
+
+    Return and print the name, bytes and microseconds of each.
+    """
+
+    rows = []
+    for name, fen, _ in perft.POSITIONS:
+        chess_board = board.new_board(backend, fen)
+        size = board_bytes(chess_board)
+        micros = copy_seconds(chess_board) * 1e6
+        rows.append((name, size, micros))
+        print(
+            f"{name:<12} {len(chess_board.pieces):>2} pieces {size:>7} bytes "
+            f"{micros:>8.1f} us/copy",
+            file=out,
+        )
+    return rows
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="footprint", description="Measure the memory and copy time of boards."
+    )
+    parser.add_argument("--backend", choices=("list", "bitboard"), default="list")
+    args = parser.parse_args(argv)
+    measure(args.backend)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
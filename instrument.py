@@ -0,0 +1,334 @@
+"""Count the calls and time of the hot parts of move generation, and profile operations.
+
+Nothing is changed until enable is called, which wraps the methods in HOT_PATHS
+to count how often they are called and how long they take,
+so while it is off move generation runs at full speed.
+disable puts the methods back.
+
+Run "python -m instrument 3" to count the calls of a perft to depth 3,
+see "python -m instrument --help" for searches, JSON snapshots and profile dumps.
+"""
+import argparse
+import cProfile
+import functools
+import inspect
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Union
+import bitboard
+import board
+import perft
+import pieces
+import search
+import tt
+
+# The classes and names of the methods that are counted,
+# a method is only wrapped on the classes that define it themselves.
+HOT_PATHS: tuple[tuple[type, str], ...] = (
+    (board.ChessBoard, "is_check"),
+    (board.ChessBoard, "copy"),
+    (board.ChessBoard, "get_pieces"),
+    (board.ChessBoard, "legal_moves"),
+    (board.ChessBoard, "generate_moves"),
+    (board.ChessBoard, "pseudo_moves"),
+    (board.ChessBoard, "checks_and_pins"),
+    (board.ChessBoard, "is_square_attacked"),
+    (board.ChessBoard, "make_move"),
+    (board.ChessBoard, "unmake_move"),
+    (bitboard.BitBoard, "is_check"),
+    (bitboard.BitBoard, "copy"),
+    (bitboard.BitBoard, "is_square_attacked"),
+    (bitboard.BitBoard, "make_move"),
+    (bitboard.BitBoard, "unmake_move"),
+    (bitboard.BitBoard, "generate_moves"),
+    (bitboard.BitBoard, "attackers"),
+    (bitboard.BitBoard, "pins"),
+    (bitboard.BitBoard, "pseudo_moves"),
+    (bitboard.BitBoard, "targets"),
+    *(
+        (piece_class, "allowed")
+        for piece_class in (
+            pieces.Pawn,
+            pieces.Knight,
+            pieces.Bishop,
+            pieces.Rook,
+            pieces.Queen,
+            pieces.King,
+        )
+    ),
+)
+
+
+class Counter:
+    """How many times a method was called and the seconds spent in it.
+
+    Calls made from inside another call of the same method add to "calls" but not to "seconds",
+    so the time is not counted twice.
+    For generators like generate_moves "seconds" is the time spent working out what they yield.
+    """
+
+    __slots__ = ("calls", "seconds", "active")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.active = 0
+
+
+counters: dict[str, Counter] = {}
+# The wrapped methods with the originals to put back, as class, name and original.
+_patched: list[tuple[type, str, Callable]] = []
+
+
+def _counted(counter: Counter, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        counter.calls += 1
+        if counter.active:
+            return method(*args, **kwargs)
+        counter.active += 1
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            counter.seconds += time.perf_counter() - start
+            counter.active -= 1
+
+    return wrapper
+
+
+def _counted_generator(counter: Counter, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        counter.calls += 1
+        generator = method(*args, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                counter.seconds += time.perf_counter() - start
+            yield item
+
+    return wrapper
+
+
+def enabled() -> bool:
+    return bool(_patched)
+
+
+def enable() -> None:
+    """Start counting the calls of HOT_PATHS, does nothing if they are counted already."""
+    if _patched:
+        return
+    for cls, name in HOT_PATHS:
+        if name not in vars(cls):
+            continue
+        method = vars(cls)[name]
+        counter = counters.setdefault(f"{cls.__name__}.{name}", Counter())
+        wrap = _counted_generator if inspect.isgeneratorfunction(method) else _counted
+        setattr(cls, name, wrap(counter, method))
+        _patched.append((cls, name, method))
+
+
+def disable() -> None:
+    """Put back the methods wrapped by enable, the counts are kept until reset."""
+    while _patched:
+        cls, name, method = _patched.pop()
+        setattr(cls, name, method)
+
+
+def reset() -> None:
+    for counter in counters.values():
+        counter.calls = 0
+        counter.seconds = 0.0
+
+
+@contextmanager
+def counting() -> Iterator[dict[str, Counter]]:
+    """Count the calls of HOT_PATHS inside a with block, starting from zero."""
+    reset()
+    enable()
+    try:
+        yield counters
+    finally:
+        disable()
+
+
+def snapshot() -> dict[str, dict[str, float]]:
+    """Return the calls and seconds of every counted method by its name, ready for JSON."""
+    return {
+        name: {"calls": counter.calls, "seconds": counter.seconds}
+        for name, counter in sorted(counters.items())
+        if counter.calls
+    }
+
+
+def search_stats(searcher: search.Search) -> dict[str, Any]:
+    """Return the statistics of a search with its speed and those of its transposition table."""
+    seconds = time.perf_counter() - searcher.start
+    return {
+        **searcher.stats(),
+        "seconds": seconds,
+        "nps": perft.nodes_per_second(searcher.nodes, seconds),
+        "table": searcher.table.stats(),
+    }
+
+
+def divide(chess_board: board.ChessBoard, depth: int) -> dict[str, dict[str, Any]]:
+    """Return the perft count and the snapshot of the counted calls below each move of a board,
+    by the move's name, to see which moves are expensive to generate.
+    """
+
+    results = {}
+    for move in chess_board.legal_moves():
+        name = board.move_name(move)
+        undo = chess_board.push(move)
+        with counting():
+            nodes = perft.perft(chess_board, depth - 1)
+        chess_board.pop(undo)
+        results[name] = {"nodes": nodes, "calls": snapshot()}
+    return results
+
+
+def profile(operation: Callable[[], Any], path: str) -> Any:
+    """Run an operation under cProfile and dump the stats to a file pstats, snakeviz
+    and other viewers can read. Return what the operation returned.
+    """
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(operation)
+    finally:
+        profiler.dump_stats(path)
+
+
+def collapsed_stacks(operation: Callable[[], Any]) -> dict[str, float]:
+    """Run an operation and return the seconds spent in each stack of Python functions,
+    not counting the functions they call.
+
+    The stacks are the names of the functions from the outermost in, joined by ";",
+    the collapsed format flamegraph.pl and speedscope make flame graphs from.
+    Every call is traced, so the operation runs many times slower than normal.
+    """
+
+    stacks: dict[str, float] = {}
+    # the frames being run, as the stack up to them, when they started and time spent in calls
+    frames: list[list[Any]] = []
+
+    def tracer(frame, event, arg) -> None:
+        if event == "call":
+            code = frame.f_code
+            name = f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}"
+            stack = f"{frames[-1][0]};{name}" if frames else name
+            frames.append([stack, time.perf_counter(), 0.0])
+        elif event == "return" and frames:
+            stack, start, in_calls = frames.pop()
+            elapsed = time.perf_counter() - start
+            stacks[stack] = stacks.get(stack, 0.0) + elapsed - in_calls
+            if frames:
+                frames[-1][2] += elapsed
+
+    sys.setprofile(tracer)
+    try:
+        operation()
+    finally:
+        sys.setprofile(None)
+    return stacks
+
+
+def write_collapsed(stacks: dict[str, float], path: str) -> None:
+    """Write stacks from collapsed_stacks to a file, with the time of each in microseconds."""
+    with open(path, "w", encoding="utf-8") as stacks_file:
+        for stack, seconds in sorted(stacks.items()):
+            micros = int(seconds * 1e6)
+            if micros:
+                stacks_file.write(f"{stack} {micros}\n")
+
+
+def print_snapshot(calls: dict[str, dict[str, float]], nodes: int, out=sys.stdout) -> None:
+    for name, counted in calls.items():
+        print(
+            f"{name:<30} {counted['calls']:>10} calls {counted['seconds']:>8.3f}s "
+            f"{counted['calls'] / nodes if nodes else 0:>8.1f} per node",
+            file=out,
+        )
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="instrument",
+        description="Count the calls of the hot parts of move generation in a perft or search.",
+    )
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--fen", default=board.STARTING_FEN, help="position to start from")
+    parser.add_argument("--backend", choices=("list", "bitboard"), default="list")
+    parser.add_argument(
+        "--search", action="store_true", help="search to the depth instead of running perft"
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="count the calls below each move of a perft"
+    )
+    parser.add_argument("--json", help="file to write the snapshot to as JSON")
+    parser.add_argument("--profile", help="file to dump cProfile stats of the operation to")
+    parser.add_argument("--flame", help="file to write the collapsed stacks of the operation to")
+    args = parser.parse_args(argv)
+
+    chess_board = board.new_board(args.backend, args.fen)
+    if args.divide:
+        results = divide(chess_board, args.depth)
+        for name, result in sorted(results.items()):
+            print(f"{name}: {result['nodes']} nodes")
+            print_snapshot(result["calls"], result["nodes"])
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as json_file:
+                json.dump(results, json_file, indent=2)
+        return 0
+
+    searcher = search.Search(chess_board, table=tt.TranspositionTable())
+
+    def operation() -> int:
+        if args.search:
+            return searcher.iterate(args.depth).nodes
+        return perft.perft(chess_board, args.depth)
+
+    with counting():
+        start = time.perf_counter()
+        nodes = operation()
+        seconds = time.perf_counter() - start
+    record: dict[str, Any] = {
+        "operation": "search" if args.search else "perft",
+        "fen": args.fen,
+        "depth": args.depth,
+        "nodes": nodes,
+        "seconds": seconds,
+        "nps": perft.nodes_per_second(nodes, seconds),
+        "calls": snapshot(),
+    }
+    if args.search:
+        record["search"] = search_stats(searcher)
+    print(f"{record['operation']} {nodes} nodes in {seconds:.3f}s, {record['nps']} nodes/s")
+    print_snapshot(record["calls"], nodes)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(record, json_file, indent=2)
+
+    if args.profile or args.flame:
+        # the operation is run again without counting, so the wrappers do not show up
+        chess_board = board.new_board(args.backend, args.fen)
+        searcher = search.Search(chess_board, table=tt.TranspositionTable())
+        if args.profile:
+            profile(operation, args.profile)
+        if args.flame:
+            chess_board = board.new_board(args.backend, args.fen)
+            searcher = search.Search(chess_board, table=tt.TranspositionTable())
+            write_collapsed(collapsed_stacks(operation), args.flame)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Pack positions into RECORD_SIZE bytes each, and keep many of them in one file.
+
+A packed position is:
+    8 bytes  which squares are taken, bit n for square n, a1 is 0 and h8 is 63, little endian
+    16 bytes a 4 bit code for each piece in the order of its square, the low half of a byte first
+    1 byte   flags, bit 0 set if black is to move and bits 1 to 4 for castling on KQkq
+    1 byte   the file of the en passant square, NO_EN_PASSANT if there is none
+    1 byte   the halfmove clock
+    2 bytes  the fullmove number, little endian
+    3 bytes  unused, so records are 32 bytes
+
+A position file is a HEADER_SIZE byte header followed by records,
+it can be appended to and is memory mapped to read records by index without copying.
+
+Run "python -m packed" to compare the size of packed and pickled boards.
+"""
+import argparse
+import mmap
+import os
+import pickle
+import struct
+import sys
+from typing import Iterable, Iterator, Union
+import batch_eval
+import board
+from chess_types import BackendString
+
+RECORD = struct.Struct("<Q16sBBBH3x")
+RECORD_SIZE = RECORD.size
+MAGIC = b"FACEPOS1"
+HEADER_SIZE = 16
+NO_EN_PASSANT = 255
+# The characters of the pieces by their codes, which are the same as in batch_eval.
+FEN_CHARS = " " + "".join(batch_eval.SYMBOLS) + "".join(batch_eval.SYMBOLS).lower()
+CASTLING = "KQkq"
+
+
+def encode_position(chess_board: board.ChessBoard) -> bytes:
+    """Return a board packed into RECORD_SIZE bytes."""
+    occupied = 0
+    codes = [0] * 32
+    count = 0
+    for sq in range(64):
+        piece = chess_board.board[sq & 7][(sq >> 3) + 1]
+        if piece:
+            occupied |= 1 << sq
+            codes[count] = batch_eval.PIECE_CODES[(piece.colour, piece.symbol)]
+            count += 1
+    nibbles = bytes(codes[i] | codes[i + 1] << 4 for i in range(0, 32, 2))
+
+    flags = 1 if chess_board.turn == "b" else 0
+    white, black = chess_board.kings["w"], chess_board.kings["b"]
+    for bit, allowed in enumerate(
+        (white.castle_close, white.castle_far, black.castle_close, black.castle_far)
+    ):
+        if allowed:
+            flags |= 2 << bit
+    en_passant = chess_board.en_passant[0] if chess_board.en_passant else NO_EN_PASSANT
+    return RECORD.pack(
+        occupied,
+        nibbles,
+        flags,
+        en_passant,
+        min(chess_board.halfmove_clock, 255),
+        min(chess_board.fullmove_number, 0xFFFF),
+    )
+
+
+def decode_fen(data: Union[bytes, memoryview]) -> str:
+    """Return the FEN string of a packed position."""
+    occupied, nibbles, flags, en_passant, halfmove, fullmove = RECORD.unpack(data)
+    codes = [code for byte in nibbles for code in (byte & 15, byte >> 4)]
+    squares = [" "] * 64
+    count = 0
+    while occupied:
+        sq = (occupied & -occupied).bit_length() - 1
+        squares[sq] = FEN_CHARS[codes[count]]
+        count += 1
+        occupied &= occupied - 1
+
+    rows = []
+    for rank in range(7, -1, -1):
+        row = ""
+        empty = 0
+        for char in squares[rank * 8 : rank * 8 + 8]:
+            if char == " ":
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            row += char
+        rows.append(row + (str(empty) if empty else ""))
+    turn = "b" if flags & 1 else "w"
+    castling = "".join(char for bit, char in enumerate(CASTLING) if flags & 2 << bit)
+    en_passant_square = "-"
+    if en_passant != NO_EN_PASSANT:
+        # the pawn that can be taken just moved past the square, away from the side to move
+        en_passant_square = board.square_name(en_passant, 6 if turn == "w" else 3)
+    return f"{'/'.join(rows)} {turn} {castling or '-'} {en_passant_square} {halfmove} {fullmove}"
+
+
+def decode_position(
+    data: Union[bytes, memoryview], backend: BackendString = "list"
+) -> board.ChessBoard:
+    """Return a board made from a packed position."""
+    return board.new_board(backend, decode_fen(data))
+
+
+class PositionFile:
+    """A file of packed positions that can be appended to and read by index.
+
+    Reading maps the file into memory, records come back as memoryviews into the map,
+    so iterating over millions of them copies nothing until they are decoded.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as position_file:
+                position_file.write(
+                    MAGIC + struct.pack("<I", RECORD_SIZE).ljust(HEADER_SIZE - len(MAGIC), b"\0")
+                )
+        with open(path, "rb") as position_file:
+            header = position_file.read(HEADER_SIZE)
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a position file")
+        self.map: Union[None, mmap.mmap] = None
+        self.view: Union[None, memoryview] = None
+        self.mapped_size = 0
+
+    def append(self, boards: Iterable[board.ChessBoard]) -> int:
+        """Add positions to the end of the file, return how many were added."""
+        count = 0
+        with open(self.path, "ab") as position_file:
+            for chess_board in boards:
+                position_file.write(encode_position(chess_board))
+                count += 1
+        return count
+
+    def _mapped(self) -> memoryview:
+        """Return a view of the records, mapping the file again if it grew.
+
+        The old map is let go of with close, so records read before the file grew still work.
+        """
+        size = os.path.getsize(self.path)
+        if self.view is None or size != self.mapped_size:
+            self.close()
+            with open(self.path, "rb") as position_file:
+                self.map = mmap.mmap(position_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped_size = size
+            self.view = memoryview(self.map)[HEADER_SIZE:]
+        return self.view
+
+    def close(self) -> None:
+        """Let go of the map, records read from it stay usable.
+
+        A map that still has records looked at is not closed here,
+        it is unmapped once the last of them is released or freed.
+        """
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+
+    def __enter__(self) -> "PositionFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_SIZE
+
+    def __getitem__(self, index: int) -> memoryview:
+        """Return the packed position at an index, without copying it."""
+        view = self._mapped()
+        count = len(view) // RECORD_SIZE
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("position index out of range")
+        return view[index * RECORD_SIZE : (index + 1) * RECORD_SIZE]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        view = self._mapped()
+        for start in range(0, len(view) - RECORD_SIZE + 1, RECORD_SIZE):
+            yield view[start : start + RECORD_SIZE]
+
+    def board(self, index: int, backend: BackendString = "list") -> board.ChessBoard:
+        return decode_position(self[index], backend)
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="packed", description="Compare the size of packed and pickled positions."
+    )
+    parser.add_argument("positions", type=int, nargs="?", default=200)
+    args = parser.parse_args(argv)
+
+    boards = [board.ChessBoard.from_fen(fen) for fen in batch_eval.random_fens(args.positions)]
+    pickled = sum(len(pickle.dumps(chess_board)) for chess_board in boards)
+    for chess_board in boards:
+        if decode_fen(encode_position(chess_board)) != chess_board.to_fen():
+            print("packing changed a position", file=sys.stderr)
+            return 1
+    print(f"pickled {pickled / len(boards):.0f} bytes per position")
+    print(f"packed  {RECORD_SIZE} bytes per position")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""Search the root moves of a position in parallel over a pool of processes.
+
+Run "python -m parallel" to see how the speed scales with the number of workers,
+compared to search.best_move.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import NamedTuple, Union
+import board
+import perft
+import pieces
+import search
+import tt
+
+# The transposition table of a worker process, kept between the moves it searches.
+_table: Union[None, tt.TranspositionTable] = None
+
+
+class RootResult(NamedTuple):
+    """What a worker found about one root move.
+
+    "move" and "pv", the line that follows it, are codes from board.encode_move.
+    "score" is from the point of view of the side to move at the root.
+    """
+
+    move: int
+    score: int
+    nodes: int
+    pv: list[int]
+
+
+def init_worker(table_mb: float) -> None:
+    global _table
+    _table = tt.TranspositionTable(table_mb)
+
+
+def worker_table() -> tt.TranspositionTable:
+    """Return the transposition table of this worker process, a new one outside of a pool."""
+    return _table if _table is not None else tt.TranspositionTable()
+
+
+def encode_line(chess_board: board.ChessBoard, line: list[pieces.Move]) -> list[int]:
+    """Return the codes of a line of moves played from the board's position."""
+    codes = []
+    undos = []
+    for move in line:
+        codes.append(board.encode_move(move))
+        undos.append(chess_board.push(move))
+    for undo in reversed(undos):
+        chess_board.pop(undo)
+    return codes
+
+
+def decode_line(chess_board: board.ChessBoard, codes: list[int]) -> list[pieces.Move]:
+    """Return the moves of a line of codes played from the board's position."""
+    line = []
+    undos = []
+    for code in codes:
+        move = board.decode_move(chess_board, code)
+        if not move:
+            break
+        line.append(move)
+        undos.append(chess_board.push(move))
+    for undo in reversed(undos):
+        chess_board.pop(undo)
+    return line
+
+
+def search_root_move(
+    fen: str,
+    history: list[int],
+    code: int,
+    depth: int,
+    alpha: int,
+    beta: int,
+    time_limit: Union[None, float],
+) -> Union[None, RootResult]:
+    """Search the position after a root move to one less than depth, in a worker.
+
+    The position comes in as a FEN string with the Zobrist keys of the positions before it,
+    so repetitions are seen, and the move as a code, so no boards or pieces have to be pickled.
+    "alpha" and "beta" are the window of the root, scores outside it are only bounds.
+    Return None if time ran out.
+    """
+
+    chess_board = board.ChessBoard.from_fen(fen)
+    chess_board.history = list(history)
+    move = board.decode_move(chess_board, code)
+    if not move:
+        return None
+    chess_board.push(move)
+    child = search.Search(chess_board, time_limit, None, worker_table())
+    try:
+        score = child.negamax(depth - 1, -beta, -alpha, 1)
+    except search.SearchTimeout:
+        return None
+    return RootResult(code, -score, child.nodes, encode_line(chess_board, child.pv[1]))
+
+
+def parallel_best_move(
+    chess_board: board.ChessBoard,
+    depth: Union[None, int] = None,
+    time_limit: Union[None, float] = None,
+    workers: Union[None, int] = None,
+    executor: Union[None, Executor] = None,
+    table_mb: float = 16,
+) -> search.SearchResult:
+    """Search for the best move like search.best_move, with the root moves split over processes.
+
+    Depth 1 is searched here. Every later iteration searches the best move so far first,
+    with the full window, then hands the other root moves to the pool together
+    with a null window on its score, which only tells if they are better.
+    The few that are get searched again with a full window.
+    A result only comes from a fully finished depth.
+    "workers" is the number of processes, all the CPUs by default.
+    An "executor" can be passed in to keep the processes, and their transposition tables,
+    between searches; it has to be set up with init_worker.
+    """
+
+    start = time.perf_counter()
+    result = search.best_move(chess_board, depth=1)
+    if not result.move:
+        return result
+    if depth is None:
+        depth = search.DEFAULT_DEPTH if time_limit is None else search.MAX_DEPTH
+
+    fen = chess_board.to_fen()
+    # only the positions since the last capture or pawn move can come up again
+    history = chess_board.history[len(chess_board.history) - chess_board.halfmove_clock :]
+    order = [board.encode_move(result.move)] + [
+        board.encode_move(move) for move in chess_board.legal_moves() if move != result.move
+    ]
+    nodes = result.nodes
+    pool = executor or ProcessPoolExecutor(
+        workers, initializer=init_worker, initargs=(table_mb,)
+    )
+
+    def time_left() -> Union[None, float]:
+        if time_limit is None:
+            return None
+        return time_limit - (time.perf_counter() - start)
+
+    def submit(code: int, iteration: int, alpha: int, beta: int) -> Future:
+        return pool.submit(
+            search_root_move, fen, history, code, iteration, alpha, beta, time_left()
+        )
+
+    try:
+        for iteration in range(2, depth + 1):
+            remaining = time_left()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                best = submit(order[0], iteration, -search.MATE - 1, search.MATE + 1).result(
+                    remaining
+                )
+            except TimeoutError:
+                break
+            if not best:
+                break
+            nodes += best.nodes
+            alpha = best.score
+
+            # the futures still running, with their move, the alpha they were given
+            # and if they have the full window
+            pending = {
+                submit(code, iteration, alpha, alpha + 1): (code, alpha, False)
+                for code in order[1:]
+            }
+            timed_out = False
+            while pending and not timed_out:
+                remaining = time_left()
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    timed_out = True
+                for future in done:
+                    code, submitted_alpha, full_window = pending.pop(future)
+                    outcome = future.result()
+                    if not outcome:
+                        timed_out = True
+                        break
+                    nodes += outcome.nodes
+                    if outcome.score <= submitted_alpha:
+                        # no better than a move searched already
+                        continue
+                    if not full_window:
+                        # beat the null window, which only gives a lower bound,
+                        # so find out its real score against alpha as it is now
+                        pending[submit(code, iteration, alpha, search.MATE + 1)] = (
+                            code,
+                            alpha,
+                            True,
+                        )
+                    elif outcome.score > alpha:
+                        best = outcome
+                        alpha = outcome.score
+            if timed_out:
+                for future in pending:
+                    future.cancel()
+                break
+
+            # search the best move first next time
+            order.remove(best.move)
+            order.insert(0, best.move)
+            pv = decode_line(chess_board, [best.move] + best.pv)
+            result = search.SearchResult(
+                pv[0], best.score, iteration, nodes, pv, time.perf_counter() - start
+            )
+            if search.is_mate_score(best.score):
+                break
+    finally:
+        if not executor:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return result._replace(nodes=nodes, seconds=time.perf_counter() - start)
+
+
+def scaling(
+    fen: str, depth: int, worker_counts: list[int], out=sys.stdout
+) -> list[tuple[int, float, float]]:
+    """Time search.best_move on a position and then a parallel search with each number of workers.
+
+    Return and print the number of workers, 0 for search.best_move, the seconds taken
+    and the speedup over search.best_move for each.
+    """
+
+    def report(workers: int, result: search.SearchResult, speedup: float) -> None:
+        name = f"{workers:>3} workers" if workers else "sequential"
+        print(
+            f"{name:<11} {result.seconds:8.2f}s {result.nodes:>9} nodes "
+            f"{perft.nodes_per_second(result.nodes, result.seconds):>8} nodes/s "
+            f"speedup {speedup:.2f} {board.move_name(result.move) if result.move else ''}",
+            file=out,
+        )
+
+    baseline = search.best_move(
+        board.ChessBoard.from_fen(fen), depth=depth, table=tt.TranspositionTable(16)
+    )
+    report(0, baseline, 1.0)
+    rows = [(0, baseline.seconds, 1.0)]
+    for workers in worker_counts:
+        with ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(16,)
+        ) as pool:
+            # start the processes before timing
+            list(pool.map(abs, range(workers)))
+            result = parallel_best_move(
+                board.ChessBoard.from_fen(fen), depth=depth, executor=pool
+            )
+        speedup = baseline.seconds / result.seconds if result.seconds else 0.0
+        rows.append((workers, result.seconds, speedup))
+        report(workers, result, speedup)
+    return rows
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="parallel", description="Time a parallel search with different numbers of workers."
+    )
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--fen", default=perft.POSITIONS[1][1])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        help="numbers of workers to try, by default 1, 2, 4 and so on up to the CPU count",
+    )
+    args = parser.parse_args(argv)
+
+    worker_counts = args.workers
+    if not worker_counts:
+        cpus = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpus:
+            worker_counts.append(worker_counts[-1] * 2)
+    scaling(args.fen, args.depth, worker_counts)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
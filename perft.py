@@ -0,0 +1,156 @@
+"""Count the positions reachable from a position, to check and time move generation.
+
+Run it with "python -m perft", see "python -m perft --help" for the options.
+"""
+import argparse
+import sys
+import time
+from typing import Union
+import board
+from chess_types import BackendString
+
+# Well known positions with their perft counts for depth 1, 2, 3 and so on.
+POSITIONS = (
+    (
+        "start",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8902, 197281, 4865609),
+    ),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (48, 2039, 97862, 4085603),
+    ),
+    (
+        "position 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        (14, 191, 2812, 43238, 674624),
+    ),
+    (
+        "position 4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        (6, 264, 9467, 422333),
+    ),
+    (
+        "position 5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        (44, 1486, 62379, 2103487),
+    ),
+    (
+        "position 6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        (46, 2079, 89890, 3894594),
+    ),
+)
+
+def perft(chess_board: board.ChessBoard, depth: int) -> int:
+    """Return the number of move sequences of a certain length from the position.
+
+    The moves at the last depth are only counted, not played.
+    """
+
+    moves = chess_board.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        undo = chess_board.push(move)
+        nodes += perft(chess_board, depth - 1)
+        chess_board.pop(undo)
+    return nodes
+
+
+def divide(chess_board: board.ChessBoard, depth: int) -> dict[str, int]:
+    """Return the perft count below each move of the position, by the move's name."""
+
+    counts = {}
+    for move in chess_board.legal_moves():
+        name = board.move_name(move)
+        undo = chess_board.push(move)
+        counts[name] = perft(chess_board, depth - 1)
+        chess_board.pop(undo)
+    return counts
+
+
+def timed_perft(
+    chess_board: board.ChessBoard, depth: int
+) -> tuple[int, float]:
+    """Return the perft count and how many seconds it took."""
+    start = time.perf_counter()
+    nodes = perft(chess_board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(
+    max_depth: int = 3, backend: BackendString = "list", out=sys.stdout
+) -> bool:
+    """Run perft on all of POSITIONS up to a depth, printing the speed of each.
+
+    Return if every count matched the expected one.
+    """
+
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in POSITIONS:
+        for depth, expected_nodes in enumerate(expected[:max_depth], 1):
+            nodes, seconds = timed_perft(board.new_board(backend, fen), depth)
+            total_nodes += nodes
+            total_time += seconds
+            ok = nodes == expected_nodes
+            passed = passed and ok
+            print(
+                f"{name:<12} depth {depth} {nodes:>9} nodes "
+                f"{nodes_per_second(nodes, seconds):>9} nodes/s "
+                f"{'ok' if ok else f'FAILED, expected {expected_nodes}'}",
+                file=out,
+            )
+    print(
+        f"total {total_nodes} nodes in {total_time:.2f}s, "
+        f"{nodes_per_second(total_nodes, total_time)} nodes/s",
+        file=out,
+    )
+    return passed
+
+
+def nodes_per_second(nodes: int, seconds: float) -> int:
+    return int(nodes / seconds) if seconds else 0
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="perft", description="Count and time the moves from a chess position."
+    )
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--fen", default=POSITIONS[0][1], help="position to start from")
+    parser.add_argument(
+        "--divide", action="store_true", help="show the count below each move"
+    )
+    parser.add_argument(
+        "--suite",
+        action="store_true",
+        help="check the reference positions up to the depth instead",
+    )
+    parser.add_argument("--backend", choices=("list", "bitboard"), default="list")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 0 if run_suite(args.depth, args.backend) else 1
+
+    chess_board = board.new_board(args.backend, args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(chess_board, args.depth)
+        for name, count in sorted(counts.items()):
+            print(f"{name}: {count}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(chess_board, args.depth)
+    seconds = time.perf_counter() - start
+    print(f"nodes {nodes}")
+    print(f"time {seconds:.3f}s, {nodes_per_second(nodes, seconds)} nodes/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
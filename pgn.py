@@ -0,0 +1,291 @@
+"""Read PGN archives a game at a time and annotate them over a pool of processes.
+
+Run "python -m pgn games.pgn -o annotated.jsonl" to analyse every move of every game,
+writing a JSON line per game as soon as it is done.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Iterator, NamedTuple, Union
+import board
+import parallel
+import pieces
+import search
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# A drop in score this big, in centipawns, from the best move to the move played is a blunder.
+BLUNDER_THRESHOLD = 200
+TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+SAN = re.compile(
+    r"^(?P<symbol>[NBRQK])?(?P<file>[a-h])?(?P<rank>[1-8])?x?"
+    r"(?P<to>[a-h][1-8])(?:=?(?P<promotion>[NBRQ]))?$"
+)
+MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+class PGNError(ValueError):
+    """Raised for a move that can not be read or played."""
+
+
+class Game(NamedTuple):
+    """A game read from a PGN archive, with its tags and its moves in SAN."""
+
+    headers: dict[str, str]
+    moves: list[str]
+    result: str
+
+
+def tokens(movetext: str) -> Iterator[str]:
+    """Yield the moves and result of PGN movetext,
+    leaving out comments, variations, NAGs and move numbers.
+    """
+    depth = 0
+    for token in re.findall(r"\{[^}]*\}?|;[^\n]*|\(|\)|[^\s(){};]+", movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth or token[0] in "{;$":
+            continue
+        else:
+            token = MOVE_NUMBER.sub("", token)
+            if token:
+                yield token
+
+
+def read_games(stream: IO[str]) -> Iterator[Game]:
+    """Yield the games of a PGN stream one at a time,
+    so only the game being read is ever held in memory.
+    """
+    headers: dict[str, str] = {}
+    movetext: list[str] = []
+    for line in stream:
+        line = line.strip()
+        match = TAG.match(line)
+        if match and movetext:
+            # a tag after movetext starts the next game
+            yield _game(headers, movetext)
+            headers, movetext = {}, []
+        if match:
+            headers[match.group(1)] = match.group(2)
+        elif line and not line.startswith("%"):
+            movetext.append(line)
+    if headers or movetext:
+        yield _game(headers, movetext)
+
+
+def _game(headers: dict[str, str], movetext: list[str]) -> Game:
+    moves = []
+    result = headers.get("Result", "*")
+    for token in tokens("\n".join(movetext)):
+        if token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return Game(headers, moves, result)
+
+
+def parse_san(chess_board: board.ChessBoard, san: str) -> pieces.Move:
+    """Return the legal move a SAN move like "Nbd7", "exd8=Q+" or "O-O" stands for."""
+    text = san.rstrip("+#!?")
+    moves = chess_board.legal_moves()
+    if text.replace("0", "O") in ("O-O", "O-O-O"):
+        king = chess_board.kings[chess_board.turn]
+        file = board.g if text.replace("0", "O") == "O-O" else board.c
+        for move in moves:
+            if move.piece is king and move.file == file and king.file == board.e:
+                return move
+        raise PGNError(f"illegal castling {san}")
+
+    match = SAN.match(text)
+    if not match:
+        raise PGNError(f"can not read move {san}")
+    symbol = match.group("symbol") or "P"
+    to = match.group("to")
+    file, rank = "abcdefgh".index(to[0]), int(to[1])
+    from_file = match.group("file")
+    from_rank = match.group("rank")
+    promotion = match.group("promotion")
+    if symbol == "P" and (rank == 1 or rank == 8):
+        promotion = promotion or "Q"
+    found = [
+        move
+        for move in moves
+        if move.piece.symbol == symbol
+        and move.file == file
+        and move.rank == rank
+        and move.promotion == promotion
+        and (not from_file or move.piece.file == "abcdefgh".index(from_file))
+        and (not from_rank or move.piece.rank == int(from_rank))
+    ]
+    if len(found) != 1:
+        raise PGNError(f"{'ambiguous' if found else 'illegal'} move {san}")
+    return found[0]
+
+
+def play(move: pieces.Move) -> None:
+    """Play a move with the move method of its piece, which checks it and changes the turn."""
+    piece = move.piece
+    if isinstance(piece, pieces.Pawn):
+        moved = piece.move(move.file, move.rank, move.promotion or "Q")
+    else:
+        moved = piece.move(move.file, move.rank)
+    if not moved:
+        raise PGNError(f"could not play {board.move_name(move)}")
+
+
+def analyse_game(game: Game, depth: int) -> dict:
+    """Replay a game and search every position in it, in a worker.
+
+    For each move this gives the score of the position for the side to move,
+    the best move found, the score of the move played
+    and whether playing it instead of the best move lost BLUNDER_THRESHOLD or more.
+    A game with a bad FEN tag or a move that can not be played gets an "error"
+    and the analysis of the moves before it.
+    """
+
+    table = parallel.worker_table()
+    try:
+        chess_board = board.ChessBoard.from_fen(game.headers.get("FEN", board.STARTING_FEN))
+    except ValueError as e:
+        return {
+            "headers": game.headers,
+            "result": game.result,
+            "status": None,
+            "moves": [],
+            "error": f"FEN tag: {e}",
+        }
+    analysis = []
+    error = None
+    for ply, san in enumerate(game.moves):
+        try:
+            move = parse_san(chess_board, san)
+        except ValueError as e:
+            error = f"ply {ply + 1}: {e}"
+            break
+        result = search.best_move(chess_board, depth=depth, table=table)
+        if result.move == move:
+            played_score = result.score
+        else:
+            undo = chess_board.push(move)
+            played_score = -search.best_move(
+                chess_board, depth=max(depth - 1, 1), table=table
+            ).score
+            chess_board.pop(undo)
+        analysis.append(
+            {
+                "ply": ply + 1,
+                "san": san,
+                "move": board.move_name(move),
+                "eval": result.score,
+                "best": board.move_name(result.move) if result.move else None,
+                "played_eval": played_score,
+                "blunder": result.score - played_score >= BLUNDER_THRESHOLD,
+            }
+        )
+        try:
+            play(move)
+        except ValueError as e:
+            error = f"ply {ply + 1}: {e}"
+            break
+    record = {
+        "headers": game.headers,
+        "result": game.result,
+        "status": chess_board.status,
+        "moves": analysis,
+    }
+    if error:
+        record["error"] = error
+    return record
+
+
+def analyse_archive(
+    stream: IO[str],
+    out: IO[str],
+    depth: int = 2,
+    workers: Union[None, int] = None,
+    table_mb: float = 16,
+    log=sys.stderr,
+) -> tuple[int, int, float]:
+    """Analyse every game of a PGN stream over a pool of processes,
+    writing a JSON line per game to "out" in the order of the archive.
+
+    At most twice as many games as workers are read ahead,
+    so memory stays the same however big the archive is.
+    Return the number of games, the number of positions and the seconds it took.
+    """
+
+    start = time.perf_counter()
+    games = positions = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        workers, initializer=parallel.init_worker, initargs=(table_mb,)
+    ) as pool:
+        in_flight: deque[tuple[Game, Future]] = deque()
+        limit = 2 * workers
+
+        def write_oldest() -> None:
+            nonlocal games, positions
+            game, future = in_flight.popleft()
+            try:
+                record = future.result()
+            except Exception as e:
+                # one game that breaks the analysis does not stop the archive
+                record = {
+                    "headers": game.headers,
+                    "result": game.result,
+                    "status": None,
+                    "moves": [],
+                    "error": repr(e),
+                }
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            games += 1
+            positions += len(record["moves"])
+
+        for game in read_games(stream):
+            if len(in_flight) >= limit:
+                write_oldest()
+            in_flight.append((game, pool.submit(analyse_game, game, depth)))
+        while in_flight:
+            write_oldest()
+
+    seconds = time.perf_counter() - start
+    print(
+        f"{games} games, {positions} positions in {seconds:.1f}s, "
+        f"{games / seconds if seconds else 0:.2f} games/s, "
+        f"{positions / seconds if seconds else 0:.1f} positions/s",
+        file=log,
+    )
+    return games, positions, seconds
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pgn", description="Annotate the games of a PGN archive as JSON lines."
+    )
+    parser.add_argument("path", help='PGN archive, "-" for stdin')
+    parser.add_argument("-o", "--output", help="JSONL file to write, stdout by default")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--workers", type=int, help="processes to use, all the CPUs by default")
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", errors="replace")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        analyse_archive(stream, out, args.depth, args.workers)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
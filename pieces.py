@@ -1,9 +1,9 @@
 from __future__ import annotations
 import abc
-from typing import Any, Union, cast
+from typing import Any, NamedTuple, Union, cast
 
 
-from chess_types import File, Rank, ColourString, WhereType, SymbolString
+from chess_types import File, Rank, ColourString, WhereType, SymbolString, StatusString
 
 a, b, c, d, e, f, g, h = range(8)
 KNIGHT_MOVES = (
@@ -12,6 +12,89 @@ KNIGHT_MOVES = (
     (-1, (-2, 2)),
     (1, (-2, 2)),
 )
+KING_MOVES = tuple(
+    (file_mod, rank_mod)
+    for file_mod in (-1, 0, 1)
+    for rank_mod in (-1, 0, 1)
+    if file_mod or rank_mod
+)
+# The castling moves as the rook's position, the file of the rook,
+# the file the king moves to, the file the rook moves to
+# and the files that must be empty between the king and the rook.
+CASTLING = (
+    ("close", h, g, f, (f, g)),
+    ("far", a, c, d, (b, c, d)),
+)
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def _on_board(file: int, rank: int) -> bool:
+    return a <= file <= h and 1 <= rank <= 8
+
+
+def _jump_table(jumps) -> list[list[tuple[tuple[File, Rank], ...]]]:
+    table: list[list[tuple[tuple[File, Rank], ...]]] = [[()] * 9 for _ in range(8)]
+    for file in range(8):
+        for rank in range(1, 9):
+            table[file][rank] = tuple(
+                cast(tuple[File, Rank], (file + file_mod, rank + rank_mod))
+                for file_mod, rank_mod in jumps
+                if _on_board(file + file_mod, rank + rank_mod)
+            )
+    return table
+
+
+def _ray_table() -> list[list[dict[tuple[int, int], tuple[tuple[File, Rank], ...]]]]:
+    table: list[list[dict[tuple[int, int], tuple[tuple[File, Rank], ...]]]] = [
+        [{} for _ in range(9)] for _ in range(8)
+    ]
+    for file in range(8):
+        for rank in range(1, 9):
+            for file_mod, rank_mod in DIRECTIONS:
+                ray = []
+                to_file, to_rank = file + file_mod, rank + rank_mod
+                while _on_board(to_file, to_rank):
+                    ray.append((to_file, to_rank))
+                    to_file, to_rank = to_file + file_mod, to_rank + rank_mod
+                table[file][rank][(file_mod, rank_mod)] = tuple(ray)
+    return table
+
+
+# Attack tables indexed the same way as the board, by file then rank.
+# KNIGHT_JUMPS and KING_JUMPS hold the squares those pieces can jump to,
+# RAYS holds for every direction the squares going outwards until the edge of the board.
+KNIGHT_JUMPS = _jump_table(
+    tuple(
+        (file_mod, rank_mod)
+        for file_mod, rank_mods in KNIGHT_MOVES
+        for rank_mod in rank_mods
+    )
+)
+KING_JUMPS = _jump_table(KING_MOVES)
+RAYS = _ray_table()
+
+
+def direction(
+    from_file: int, from_rank: int, file: int, rank: int
+) -> Union[None, tuple[int, int]]:
+    """Return the direction of the line from one square to another, if they are on one."""
+    file_diff = file - from_file
+    rank_diff = rank - from_rank
+    if not (file_diff or rank_diff):
+        return None
+    if file_diff and rank_diff and abs(file_diff) != abs(rank_diff):
+        return None
+    return (
+        (file_diff > 0) - (file_diff < 0),
+        (rank_diff > 0) - (rank_diff < 0),
+    )
+
+
+# Statuses from ChessBoard.game_status after which no more moves can be made.
+# Draws by repetition and the fifty move rule have to be claimed, so play can go on after them.
+GAME_OVER = ("checkmate", "stalemate")
 
 
 class ChessPiece(abc.ABC):
@@ -19,15 +102,24 @@ class ChessPiece(abc.ABC):
 
     A chess piece has a file and a rank.
     These denote the column and row it is on respictively.
+
+    Pieces only have slots for what differs between them,
+    the "symbol" and the "unicodes" of each colour are kept on the class.
     """
 
+    __slots__ = ("file", "rank", "colour", "board")
+
     file: File
     rank: Rank
     colour: ColourString
     symbol: SymbolString
-    unicode: str
+    unicodes: dict[ColourString, str]
     board: BaseBoard
 
+    @property
+    def unicode(self) -> str:
+        return self.unicodes[self.colour]
+
     @abc.abstractmethod
     def __init__(
         self,
@@ -77,10 +169,105 @@ class ChessPiece(abc.ABC):
         """
         ...
 
+    def not_check(self, file: int, rank: int) -> bool:
+        """Return if moving to the file and rank leaves this piece's king out of check."""
+        return not self.board.is_check(
+            self.colour, (self, cast(File, file), cast(Rank, rank))
+        )
+
+    def slides_to(self, file: int, rank: int, directions) -> bool:
+        """Return if the file and rank can be reached along one of the directions
+        without jumping over a piece, ignoring what is on the square itself.
+        """
+        line = direction(self.file, self.rank, file, rank)
+        if line not in directions:
+            return False
+        for to_file, to_rank in RAYS[self.file][self.rank][line]:
+            if to_file == file and to_rank == rank:
+                return True
+            if self.board.board[to_file][to_rank]:
+                return False
+        return False
+
+    def slide_moves(self, directions, check: bool = True) -> list[tuple[File, Rank]]:
+        """Return the moves along the rays in the directions, stopping at the first piece."""
+        moves = []
+        for line in directions:
+            for to_file, to_rank in RAYS[self.file][self.rank][line]:
+                on_square = self.board.board[to_file][to_rank]
+                if on_square and on_square.colour == self.colour:
+                    break
+                if not check or self.not_check(to_file, to_rank):
+                    moves.append((to_file, to_rank))
+                if on_square:
+                    break
+        return moves
+
+    def jump_moves(self, table, check: bool = True) -> list[tuple[File, Rank]]:
+        """Return the moves to the squares in an attack table that are not taken by an own piece."""
+        moves = []
+        for to_file, to_rank in table[self.file][self.rank]:
+            on_square = self.board.board[to_file][to_rank]
+            if on_square and on_square.colour == self.colour:
+                continue
+            if not check or self.not_check(to_file, to_rank):
+                moves.append((to_file, to_rank))
+        return moves
+
+
+def castle_rook(king_from: int, king_to: int) -> Union[None, tuple[File, File]]:
+    """Return the file the rook moves from and to if a king move between the files is castling."""
+    if king_from != e or abs(king_to - king_from) != 2:
+        return None
+    for _, rook_file, king_file, rook_to, _ in CASTLING:
+        if king_file == king_to:
+            return cast(File, rook_file), cast(File, rook_to)
+    return None
+
+
+class Move(NamedTuple):
+    """A move of a piece to a file and rank.
+
+    "promotion" is the symbol a pawn is promoted to when it reaches the last rank.
+    """
+
+    piece: ChessPiece
+    file: File
+    rank: Rank
+    promotion: Union[None, SymbolString] = None
+
+
+class Undo(NamedTuple):
+    """Everything BaseBoard.unmake_move needs to take back a move.
+
+    "castling" holds the castle_close and castle_far flags of the white
+    and then the black king from before the move.
+    "en_passant" is the en passant square from before the move
+    and "promoted" the piece a pawn was promoted to, if any.
+    "key" is the Zobrist key of the board from before the move,
+    "scores" its middlegame score, endgame score and phase
+    and "clocks" its halfmove clock and fullmove number.
+    """
+
+    piece: ChessPiece
+    file: File
+    rank: Rank
+    captured: Union[None, ChessPiece]
+    captured_index: int
+    castling: tuple[bool, bool, bool, bool]
+    position: Union[None, str]
+    en_passant: Union[None, tuple[File, Rank]]
+    promoted: Union[None, ChessPiece]
+    key: int
+    scores: tuple[int, int, int]
+    clocks: tuple[int, int]
+
 
 class BaseBoard(abc.ABC):
     turn: ColourString
     checkmate: bool
+    status: StatusString
+    en_passant: Union[None, tuple[File, Rank]]
     pieces: list[ChessPiece]
     board: list[list[Union[None, ChessPiece]]]
 
@@ -108,12 +295,38 @@ class BaseBoard(abc.ABC):
     ) -> bool:
         ...
 
+    @abc.abstractmethod
+    def is_square_attacked(self, file: int, rank: int, by_colour: ColourString) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def make_move(
+        self,
+        piece: ChessPiece,
+        file: File,
+        rank: Rank,
+        promotion: Union[None, SymbolString] = None,
+    ) -> Undo:
+        ...
+
+    @abc.abstractmethod
+    def unmake_move(self, undo: Undo) -> None:
+        ...
+
+    @abc.abstractmethod
+    def legal_moves(self, colour: Union[None, ColourString] = None) -> list[Move]:
+        ...
+
     @abc.abstractmethod
     def change_turn(self) -> None:
         ...
 
 
 class Rook(ChessPiece):
+    __slots__ = ("position",)
+    symbol = "R"
+    unicodes = {"w": "\u2656", "b": "\u265c"}
+
     def __init__(
         self,
         file: File,
@@ -124,8 +337,6 @@ class Rook(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "R"
-        self.unicode = "\u2656" if colour == "w" else "\u265c"
         self.board = board
         if self.file == a and (self.rank == 1 or self.rank == 8):
             self.position = "far"
@@ -135,82 +346,27 @@ class Rook(ChessPiece):
             self.position = None
 
     def allowed(self, file: int, rank: int, check: bool = True) -> bool:
-        on_board = a <= file <= h and 1 <= rank <= 8
+        on_board = _on_board(file, rank)
         on_square = on_board and self.board.board[file][rank]
-        valid_move = False
         not_own_colour = True if not on_square else on_square.colour != self.colour
-        not_check = True
-
-        clear_file = True
-        clear_rank = True
-        for piece in self.board.pieces:
-            between_rank = (
-                rank < piece.rank < self.rank or self.rank < piece.rank < rank
-            )
-            between_file = (
-                file < piece.file < self.file or self.file < piece.file < file
-            )
-
-            if piece.file == file and between_rank:
-                clear_rank = False
-            elif piece.rank == rank and between_file:
-                clear_file = False
-        valid_move = (
-            self.file == file and clear_rank or self.rank == rank and clear_file
-        )
+        valid_move = on_board and self.slides_to(file, rank, ROOK_DIRECTIONS)
 
         # Make sure that check method is only called on correct moves
-        if check and on_board and not_own_colour and valid_move:
-            not_check = not self.board.is_check(
-                self.colour, (self, cast(File, file), cast(Rank, rank))
-            )
-        return valid_move and on_board and not_own_colour and not_check
+        if check and valid_move and not_own_colour:
+            return self.not_check(file, rank)
+        return valid_move and not_own_colour
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        moves = []
-        for file_mod in range(a - self.file, h - self.file + 1):
-            if file_mod == 0:
-                continue
-            if self.allowed(self.file + file_mod, self.rank, check=check):
-                moves.append((self.file + file_mod, self.rank))
-        for rank_mod in range(1 - self.file, 8 - self.file):
-            if rank_mod == 0:
-                continue
-            if self.allowed(self.file, self.rank + rank_mod, check=check):
-                moves.append((self.file, self.rank + rank_mod))
-        return moves
+        return self.slide_moves(ROOK_DIRECTIONS, check=check)
 
     def move(self, file: File, rank: Rank) -> bool:
         moved = False
         if (
             self.allowed(file, rank)
             and self.board.turn == self.colour
-            and not self.board.checkmate
+            and self.board.status not in GAME_OVER
         ):
-            self.board.board[self.file][self.rank] = None
-            in_spot = self.board.board[file][rank]
-            if type(in_spot) == ChessPiece:
-                del in_spot
-            self.board.board[file][rank] = self
-            self.file = file
-            self.rank = rank
-            if self.position:
-                king = cast(
-                    King,
-                    self.board.get_piece(
-                        {
-                            "colour": self.colour,
-                            "symbol": "K",
-                            "file": None,
-                            "rank": None,
-                        }
-                    ),
-                )
-                if self.position == "close":
-                    king.castle_close = False
-                elif self.position == "far":
-                    king.castle_far = False
-
+            self.board.make_move(self, file, rank)
             self.board.change_turn()
             moved = True
         return moved
@@ -233,6 +389,10 @@ class Knight(ChessPiece):
     file-1,rank-2,
     file+1,rank-2"""
 
+    __slots__ = ()
+    symbol = "N"
+    unicodes = {"w": "\u2658", "b": "\u265e"}
+
     def __init__(
         self,
         file: File,
@@ -243,55 +403,30 @@ class Knight(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "N"
-        self.unicode = "\u2658" if colour == "w" else "\u265e"
         self.board = board
 
     def allowed(self, file: int, rank: int, check: bool = True) -> bool:
-        on_board = a <= file <= h and 1 <= rank <= 8
+        on_board = _on_board(file, rank)
         on_square = on_board and self.board.board[file][rank]
-        valid_move = False
         not_own_colour = True if not on_square else on_square.colour != self.colour
-        not_check = True
-
-        for file_mod, rank_mods in KNIGHT_MOVES:
-            for rank_mod in rank_mods:
-                if self.file + file_mod == file and self.rank + rank_mod == rank:
-                    valid_move = True
+        valid_move = on_board and (file, rank) in KNIGHT_JUMPS[self.file][self.rank]
 
         # Make sure that check method is only called on correct moves
-        if check and on_board and not_own_colour and valid_move:
-            not_check = not self.board.is_check(
-                self.colour, (self, cast(File, file), cast(Rank, rank))
-            )
-        return valid_move and on_board and not_own_colour and not_check
+        if check and valid_move and not_own_colour:
+            return self.not_check(file, rank)
+        return valid_move and not_own_colour
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        moves = []
-        for file_mod, rank_mods in KNIGHT_MOVES:
-            for rank_mod in rank_mods:
-                allowed = self.allowed(
-                    self.file + file_mod, self.rank + rank_mod, check=check
-                )
-                if allowed:
-                    moves.append((self.file + file_mod, self.rank + rank_mod))
-
-        return cast(list[tuple[File, Rank]], moves)
+        return self.jump_moves(KNIGHT_JUMPS, check=check)
 
     def move(self, file: File, rank: Rank) -> bool:
         moved = False
         if (
             self.allowed(file, rank)
             and self.board.turn == self.colour
-            and not self.board.checkmate
+            and self.board.status not in GAME_OVER
         ):
-            self.board.board[self.file][self.rank] = None
-            in_spot = self.board.board[file][rank]
-            if type(in_spot) == ChessPiece:
-                del in_spot
-            self.board.board[file][rank] = self
-            self.file = file
-            self.rank = rank
+            self.board.make_move(self, file, rank)
             self.board.change_turn()
             moved = True
 
@@ -302,6 +437,10 @@ class Knight(ChessPiece):
 
 
 class Bishop(ChessPiece):
+    __slots__ = ()
+    symbol = "B"
+    unicodes = {"w": "\u2657", "b": "\u265d"}
+
     def __init__(
         self,
         file: File,
@@ -312,80 +451,30 @@ class Bishop(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "B"
-        self.unicode = "\u2657" if colour == "w" else "\u265d"
         self.board: BaseBoard = board
 
     def allowed(self, file: int, rank: int, check: bool = True) -> bool:
-        on_board = a <= file <= h and 1 <= rank <= 8
+        on_board = _on_board(file, rank)
         on_square = on_board and self.board.board[file][rank]
-        valid_move = abs(self.file - file) == abs(self.rank - rank)
         not_own_colour = True if not on_square else on_square.colour != self.colour
-        not_check = True
-
-        # towards top right
-        if file > self.file and rank > self.rank:
-            for i in range(1, min(file - self.file, rank - self.rank) + 1):
-                if self.board.board[self.file + 1][self.rank + 1]:
-                    valid_move = False
-        # towards top left
-        if file < self.file and rank > self.rank:
-            for i in range(1, min(self.file, 8 - self.rank) + 1):
-                if self.board.board[self.file - 1][self.rank + 1]:
-                    valid_move = False
-        # towards bottom right
-        if file > self.file and rank < self.rank:
-            for i in range(1, min(h - self.file, self.rank) + 1):
-                if self.board.board[self.file + 1][self.rank - 1]:
-                    valid_move = False
-        # towards bottom left
-        if file < self.file and rank < self.rank:
-            for i in range(1, min(self.file, self.rank) + 1):
-                if self.board.board[self.file - 1][self.rank - 1]:
-                    valid_move = False
+        valid_move = on_board and self.slides_to(file, rank, BISHOP_DIRECTIONS)
 
         # Make sure that check method is only called on correct moves
-        if check and on_board and not_own_colour and valid_move:
-            not_check = not self.board.is_check(
-                self.colour, (self, cast(File, file), cast(Rank, rank))
-            )
-        return valid_move and on_board and not_own_colour and not_check
+        if check and valid_move and not_own_colour:
+            return self.not_check(file, rank)
+        return valid_move and not_own_colour
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        moves = []
-        # towards top right
-        for i in range(1, min(h - self.file, 8 - self.rank) + 1):
-            if self.allowed(self.file + i, self.rank + i, check=check):
-                moves.append((self.file + i, self.rank + i))
-        # towards top left
-        for i in range(1, min(self.file, 8 - self.rank) + 1):
-            if self.allowed(self.file - i, self.rank + i, check=check):
-                moves.append((self.file - i, self.rank + i))
-        # towards bottom right
-        for i in range(1, min(h - self.file, self.rank) + 1):
-            if self.allowed(self.file + i, self.rank - i, check=check):
-                moves.append((self.file + i, self.rank - i))
-        # towards bottom left
-        for i in range(1, min(self.file, self.rank) + 1):
-            if self.allowed(self.file - i, self.rank - i, check=check):
-                moves.append((self.file - i, self.rank - i))
-        return cast(list[tuple[File, Rank]], moves)
+        return self.slide_moves(BISHOP_DIRECTIONS, check=check)
 
     def move(self, file: File, rank: Rank) -> bool:
-        moved = False
         moved = False
         if (
             self.allowed(file, rank)
             and self.board.turn == self.colour
-            and not self.board.checkmate
+            and self.board.status not in GAME_OVER
         ):
-            self.board.board[self.file][self.rank] = None
-            in_spot = self.board.board[file][rank]
-            if type(in_spot) == ChessPiece:
-                del in_spot
-            self.board.board[file][rank] = self
-            self.file = file
-            self.rank = rank
+            self.board.make_move(self, file, rank)
             self.board.change_turn()
             moved = True
         return moved
@@ -395,6 +484,10 @@ class Bishop(ChessPiece):
 
 
 class Queen(ChessPiece):
+    __slots__ = ()
+    symbol = "Q"
+    unicodes = {"w": "\u2655", "b": "\u265b"}
+
     def __init__(
         self,
         file: File,
@@ -405,18 +498,32 @@ class Queen(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "Q"
-        self.unicode = "\u2655" if colour == "w" else "\u265b"
         self.board = board
 
-    def allowed(self, file: File, rank: Rank, check: bool = True) -> bool:
-        ...
+    def allowed(self, file: int, rank: int, check: bool = True) -> bool:
+        on_board = _on_board(file, rank)
+        on_square = on_board and self.board.board[file][rank]
+        not_own_colour = True if not on_square else on_square.colour != self.colour
+        valid_move = on_board and self.slides_to(file, rank, DIRECTIONS)
+
+        # Make sure that check method is only called on correct moves
+        if check and valid_move and not_own_colour:
+            return self.not_check(file, rank)
+        return valid_move and not_own_colour
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        return []
+        return self.slide_moves(DIRECTIONS, check=check)
 
     def move(self, file: File, rank: Rank) -> bool:
         moved = False
+        if (
+            self.allowed(file, rank)
+            and self.board.turn == self.colour
+            and self.board.status not in GAME_OVER
+        ):
+            self.board.make_move(self, file, rank)
+            self.board.change_turn()
+            moved = True
         return moved
 
     def copy(self):
@@ -424,6 +531,17 @@ class Queen(ChessPiece):
 
 
 class King(ChessPiece):
+    """The king moves one square in any direction.
+
+    If neither it nor a rook has moved it can also castle,
+    moving two squares towards the rook, which jumps over it.
+    "castle_close" and "castle_far" keep track of which sides it can still castle on.
+    """
+
+    __slots__ = ("castle_close", "castle_far")
+    symbol = "K"
+    unicodes = {"w": "\u2654", "b": "\u265a"}
+
     def __init__(
         self,
         file: File,
@@ -434,20 +552,68 @@ class King(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "K"
-        self.unicode = "\u2654" if colour == "w" else "\u265a"
         self.board = board
         self.castle_close = True
         self.castle_far = True
 
-    def allowed(self, file: File, rank: Rank, check: bool = True) -> bool:
-        ...
+    def allowed(self, file: int, rank: int, check: bool = True) -> bool:
+        on_board = _on_board(file, rank)
+        on_square = on_board and self.board.board[file][rank]
+        not_own_colour = True if not on_square else on_square.colour != self.colour
+        valid_move = on_board and (file, rank) in KING_JUMPS[self.file][self.rank]
+
+        # Castling is never a capture so it is only looked at when checks are
+        if check and not valid_move and on_board:
+            return (file, rank) in self.castle_moves()
+        # Make sure that check method is only called on correct moves
+        if check and valid_move and not_own_colour:
+            return self.not_check(file, rank)
+        return valid_move and not_own_colour
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        return []
+        moves = self.jump_moves(KING_JUMPS, check=check)
+        if check:
+            moves += self.castle_moves()
+        return moves
+
+    def castle_moves(self) -> list[tuple[File, Rank]]:
+        """Return the squares the king can castle to.
+
+        The king can not castle out of, through or into check.
+        """
+        moves: list[tuple[File, Rank]] = []
+        if self.file != e or self.rank != (1 if self.colour == "w" else 8):
+            return moves
+        other = "b" if self.colour == "w" else "w"
+        for position, rook_file, king_file, rook_to, between in CASTLING:
+            if not (self.castle_close if position == "close" else self.castle_far):
+                continue
+            rook = self.board.board[rook_file][self.rank]
+            if (
+                not isinstance(rook, Rook)
+                or rook.colour != self.colour
+                or rook.position != position
+            ):
+                continue
+            if any(self.board.board[between_file][self.rank] for between_file in between):
+                continue
+            if not any(
+                self.board.is_square_attacked(passed, self.rank, other)
+                for passed in (e, rook_to, king_file)
+            ):
+                moves.append((cast(File, king_file), self.rank))
+        return moves
 
     def move(self, file: File, rank: Rank) -> bool:
         moved = False
+        if (
+            self.allowed(file, rank)
+            and self.board.turn == self.colour
+            and self.board.status not in GAME_OVER
+        ):
+            self.board.make_move(self, file, rank)
+            self.board.change_turn()
+            moved = True
         return moved
 
     def copy(self):
@@ -458,6 +624,17 @@ class King(ChessPiece):
 
 
 class Pawn(ChessPiece):
+    """The pawn moves one square forward, or two from its starting rank,
+    and captures one square diagonally forward.
+
+    It can also capture a pawn that just moved two squares past it, en passant,
+    and is promoted when it reaches the last rank.
+    """
+
+    __slots__ = ()
+    symbol = "P"
+    unicodes = {"w": "\u2659", "b": "\u265f"}
+
     def __init__(
         self,
         file: File,
@@ -468,19 +645,61 @@ class Pawn(ChessPiece):
         self.file = file
         self.rank = rank
         self.colour = colour
-        self.symbol = "P"
-        self.unicode = "\u2659" if colour == "w" else "\u265f"
         self.board = board
 
-    def allowed(self, file: File, rank: Rank, check: bool = True) -> bool:
-        ...
+    def allowed(self, file: int, rank: int, check: bool = True) -> bool:
+        valid_move = (file, rank) in self.allowed_moves(check=False)
+
+        # Make sure that check method is only called on correct moves
+        if check and valid_move:
+            return self.not_check(file, rank)
+        return valid_move
 
     def allowed_moves(self, check: bool = True) -> list[tuple[File, Rank]]:
-        return []
+        moves = []
+        forward = 1 if self.colour == "w" else -1
+        rank = self.rank + forward
+        if not 1 <= rank <= 8:
+            return moves
+        if not self.board.board[self.file][rank]:
+            moves.append((self.file, rank))
+            start = 2 if self.colour == "w" else 7
+            if self.rank == start and not self.board.board[self.file][rank + forward]:
+                moves.append((self.file, rank + forward))
+        for file in (self.file - 1, self.file + 1):
+            if not a <= file <= h:
+                continue
+            on_square = self.board.board[file][rank]
+            if on_square and on_square.colour != self.colour:
+                moves.append((file, rank))
+            elif (
+                (file, rank) == self.board.en_passant
+                and rank == (6 if self.colour == "w" else 3)
+            ):
+                moves.append((file, rank))
+        if check:
+            moves = [move for move in moves if self.not_check(*move)]
+        return cast(list[tuple[File, Rank]], moves)
 
-    def move(self, file: File, rank: Rank) -> bool:
+    def move(self, file: File, rank: Rank, promotion: SymbolString = "Q") -> bool:
         moved = False
+        if (
+            self.allowed(file, rank)
+            and self.board.turn == self.colour
+            and self.board.status not in GAME_OVER
+        ):
+            self.board.make_move(self, file, rank, promotion)
+            self.board.change_turn()
+            moved = True
         return moved
 
     def copy(self):
         return Pawn(self.file, self.rank, self.colour, self.board)
+
+
+PROMOTIONS: dict[SymbolString, type[ChessPiece]] = {
+    "Q": Queen,
+    "R": Rook,
+    "B": Bishop,
+    "N": Knight,
+}
@@ -0,0 +1,469 @@
+import threading
+import time
+from typing import Callable, Iterator, NamedTuple, Union
+import board
+import book
+import evaluation
+import pieces
+import tablebase
+import tt
+
+MATE = 100000
+MAX_DEPTH = 64
+DEFAULT_DEPTH = 4
+
+# How much pieces are worth when ordering captures, most valuable victim first
+# and then least valuable attacker first.
+ORDER_VALUES = {"P": 1, "N": 2, "B": 3, "R": 4, "Q": 5, "K": 6}
+# Sort scores of the kinds of moves, the hash move goes first,
+# then captures and promotions, then killer moves and then the rest by their history.
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 20
+KILLER_SCORES = (1 << 19, 1 << 18)
+# Piece values for the static exchange evaluation, the king can never be taken.
+SEE_VALUES = {**evaluation.MG_VALUES, "K": MATE}
+# History scores are halved when one of them gets above this, so they stay below the killers.
+MAX_HISTORY = 1 << 17
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when it runs out of time or nodes."""
+
+
+class SearchResult(NamedTuple):
+    """The outcome of a search.
+
+    "move" is the best move found, None if there are no legal moves,
+    "score" is in centipawns from the point of view of the side to move,
+    "depth" is the deepest iteration that was finished,
+    "pv" is the principal variation, the line of best moves starting with "move".
+    """
+
+    move: Union[None, pieces.Move]
+    score: int
+    depth: int
+    nodes: int
+    pv: list[pieces.Move]
+    seconds: float
+
+
+def is_mate_score(score: int) -> bool:
+    return abs(score) > MATE - MAX_DEPTH * 2
+
+
+def see(chess_board: board.ChessBoard, move: pieces.Move) -> int:
+    """Return the static exchange evaluation of a move, the material it wins or loses
+    in centipawns if both sides keep capturing on its square with their least valuable piece
+    for as long as that pays off. Pins are not looked at.
+    """
+
+    piece = move.piece
+    victim = chess_board.board[move.file][move.rank]
+    if victim:
+        gain = [SEE_VALUES[victim.symbol]]
+    elif piece.symbol == "P" and move.file != piece.file:
+        gain = [SEE_VALUES["P"]]
+    else:
+        gain = [0]
+    attacker_value = SEE_VALUES[piece.symbol]
+    if move.promotion:
+        gain[0] += SEE_VALUES[move.promotion] - SEE_VALUES["P"]
+        attacker_value = SEE_VALUES[move.promotion]
+
+    ignore = {piece}
+    colour = "b" if piece.colour == "w" else "w"
+    while True:
+        attackers = chess_board.square_attackers(move.file, move.rank, colour, ignore)
+        if not attackers:
+            break
+        attacker = min(attackers, key=lambda p: SEE_VALUES[p.symbol])
+        # what the side capturing now ends up with if the exchange stops after this capture
+        gain.append(attacker_value - gain[-1])
+        attacker_value = SEE_VALUES[attacker.symbol]
+        ignore.add(attacker)
+        colour = "b" if colour == "w" else "w"
+    # each side can choose to stop capturing, going back from the end
+    while len(gain) > 1:
+        last = gain.pop()
+        gain[-1] = -max(-gain[-1], last)
+    return gain[0]
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    """Make a mate score relative to the position instead of the root, for storing."""
+    if is_mate_score(score):
+        return score + ply if score > 0 else score - ply
+    return score
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    if is_mate_score(score):
+        return score - ply if score > 0 else score + ply
+    return score
+
+
+class Search:
+    """A negamax alpha-beta search over a ChessBoard.
+
+    The board is walked with push and pop, so it is back in its starting position
+    when the search returns, even if it was stopped.
+
+    Setting "stop_event" from another thread stops the search like running out of time,
+    and "report" is called with the result of every finished iteration.
+    Positions with the material of one of the "tablebases" are scored from it, without searching.
+    """
+
+    def __init__(
+        self,
+        chess_board: board.ChessBoard,
+        time_limit: Union[None, float] = None,
+        max_nodes: Union[None, int] = None,
+        table: Union[None, tt.TranspositionTable] = None,
+        stop_event: Union[None, threading.Event] = None,
+        report: Union[None, Callable[[SearchResult], None]] = None,
+        tablebases: Union[None, tablebase.Tablebases] = None,
+    ) -> None:
+        self.board = chess_board
+        self.table = table if table is not None else tt.TranspositionTable()
+        self.table.new_search()
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.start = time.perf_counter()
+        self.pv: list[list[pieces.Move]] = [[] for _ in range(MAX_DEPTH + 1)]
+        self.previous_pv: list[pieces.Move] = []
+        self.stop_event = stop_event
+        self.report = report
+        self.tablebases = tablebases
+        self.tb_hits = 0
+        # two quiet moves per ply that caused a beta cutoff, the latest first
+        self.killers: list[list[Union[None, pieces.Move]]] = [
+            [None, None] for _ in range(MAX_DEPTH + 1)
+        ]
+        # how often quiet moves caused a cutoff, by the from and to square of board.encode_move
+        self.history = [0] * 4096
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.qnodes = 0
+        self.see_pruned = 0
+
+    def check_limits(self) -> None:
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchTimeout
+        # looking at the clock is slow, so only do it every so often
+        if self.nodes & 255 == 0:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout
+            if (
+                self.time_limit is not None
+                and time.perf_counter() - self.start >= self.time_limit
+            ):
+                raise SearchTimeout
+
+    def capture_score(self, move: pieces.Move) -> int:
+        """Return the MVV-LVA score of a capture or promotion, 0 for quiet moves."""
+        piece = move.piece
+        victim = self.board.board[move.file][move.rank]
+        if victim:
+            score = ORDER_VALUES[victim.symbol] * 8 - ORDER_VALUES[piece.symbol]
+        elif piece.symbol == "P" and move.file != piece.file:
+            # en passant
+            score = ORDER_VALUES["P"] * 8 - ORDER_VALUES["P"]
+        else:
+            score = 0
+        if move.promotion:
+            score += ORDER_VALUES[move.promotion] * 8
+        return score
+
+    def score_move(
+        self, move: pieces.Move, ply: int, best: Union[None, pieces.Move]
+    ) -> int:
+        if move == best:
+            return HASH_MOVE_SCORE
+        capture = self.capture_score(move)
+        if capture:
+            return CAPTURE_SCORE + capture
+        killers = self.killers[ply]
+        if move == killers[0]:
+            return KILLER_SCORES[0]
+        if move == killers[1]:
+            return KILLER_SCORES[1]
+        return self.history[board.encode_move(move) & 4095]
+
+    def ordered_moves(
+        self, ply: int, hash_move: Union[None, pieces.Move]
+    ) -> Iterator[pieces.Move]:
+        """Yield the legal moves in the order most likely to cause a cutoff.
+
+        That is the best move from the transposition table,
+        or else the move of the previous iteration's principal variation,
+        then captures that do not lose material by the static exchange evaluation,
+        by most valuable victim and least valuable attacker,
+        then the killer moves of the ply, the rest by the history table
+        and last the captures that lose material.
+        The moves come from the board a stage at a time, so after a cutoff
+        the later stages are never generated.
+        """
+
+        best = hash_move
+        if not (best and self.board.is_legal(best)):
+            best = None
+            if ply < len(self.previous_pv) and self.board.is_legal(self.previous_pv[ply]):
+                best = self.previous_pv[ply]
+        if best:
+            yield best
+        captures = [
+            move for move in self.board.generate_moves(quiets=False) if move != best
+        ]
+        losing = [move for move in captures if see(self.board, move) < 0]
+        good = [move for move in captures if move not in losing]
+        yield from sorted(good, key=lambda move: -self.score_move(move, ply, best))
+        quiets = [
+            move for move in self.board.generate_moves(captures=False) if move != best
+        ]
+        yield from sorted(quiets, key=lambda move: -self.score_move(move, ply, best))
+        yield from sorted(losing, key=lambda move: -self.score_move(move, ply, best))
+
+    def add_cutoff(self, move: pieces.Move, ply: int, depth: int, first: bool) -> None:
+        """Keep track of a move that caused a beta cutoff in the killers and history."""
+        self.cutoffs += 1
+        if first:
+            self.first_move_cutoffs += 1
+        if self.capture_score(move):
+            return
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        index = board.encode_move(move) & 4095
+        self.history[index] += depth * depth
+        if self.history[index] > MAX_HISTORY:
+            self.history = [score // 2 for score in self.history]
+
+    def first_move_cutoff_rate(self) -> float:
+        """Return the share of beta cutoffs caused by the first move tried,
+        the higher it is the better the moves are ordered.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "nodes": self.nodes,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate(),
+            "qnodes": self.qnodes,
+            "see_pruned": self.see_pruned,
+            "tb_hits": self.tb_hits,
+        }
+
+    def negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Return the score of the position for the side to move, searched to a depth.
+
+        Scores outside of alpha and beta are only bounds.
+        """
+
+        self.nodes += 1
+        self.check_limits()
+        self.pv[ply] = []
+
+        # a position repeated once inside the search is taken as a draw,
+        # as either side can repeat it again if that is their best
+        if ply > 0 and (self.board.halfmove_clock >= 100 or self.board.repetitions()):
+            return 0
+        if ply > 0 and self.tablebases:
+            probe = self.tablebases.probe(self.board)
+            if probe:
+                self.tb_hits += 1
+                if probe.wdl > 0:
+                    return MATE - ply - probe.plies
+                if probe.wdl < 0:
+                    return -MATE + ply + probe.plies
+                return 0
+
+        key = self.board.key
+        entry = self.table.probe(key)
+        hash_move = None
+        if entry:
+            if ply > 0 and entry.depth >= depth:
+                score = score_from_tt(entry.score, ply)
+                if (
+                    entry.bound == tt.EXACT
+                    or entry.bound == tt.LOWER
+                    and score >= beta
+                    or entry.bound == tt.UPPER
+                    and score <= alpha
+                ):
+                    return score
+            hash_move = board.decode_move(self.board, entry.move)
+
+        if depth <= 0 or ply >= MAX_DEPTH:
+            return self.quiesce(alpha, beta, ply)
+
+        original_alpha = alpha
+        best_move = None
+        i = -1
+        for i, move in enumerate(self.ordered_moves(ply, hash_move)):
+            undo = self.board.push(move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self.board.pop(undo)
+            if score > alpha:
+                alpha = score
+                best_move = move
+                self.pv[ply] = [move] + self.pv[ply + 1]
+                if alpha >= beta:
+                    self.add_cutoff(move, ply, depth, i == 0)
+                    break
+        if i < 0:
+            return -MATE + ply if self.board.is_check(self.board.turn) else 0
+
+        if alpha >= beta:
+            bound = tt.LOWER
+        elif alpha > original_alpha:
+            bound = tt.EXACT
+        else:
+            bound = tt.UPPER
+        self.table.store(
+            key,
+            depth,
+            bound,
+            score_to_tt(alpha, ply),
+            board.encode_move(best_move) if best_move else 0,
+        )
+        return alpha
+
+    def quiesce(self, alpha: int, beta: int, ply: int) -> int:
+        """Return the score of the position for the side to move,
+        searching only captures and promotions until the position is quiet.
+
+        The side to move can stand pat, take the static evaluation instead of capturing,
+        unless it is in check, when every evasion is searched.
+        Captures that lose material by the static exchange evaluation are skipped.
+        Checkmate is found from the evasions, stalemate only if there is nothing to capture
+        and standing pat did not already fail high.
+        """
+
+        self.nodes += 1
+        self.qnodes += 1
+        self.check_limits()
+        self.pv[ply] = []
+
+        in_check = self.board.is_check(self.board.turn)
+        if not in_check:
+            stand_pat = evaluation.evaluate(self.board)
+            if stand_pat >= beta or ply >= MAX_DEPTH:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+
+        moves = list(self.board.generate_moves(quiets=in_check))
+        if not moves:
+            if in_check:
+                return -MATE + ply
+            if not self.board.has_legal_move():
+                return 0
+            return alpha
+        if ply >= MAX_DEPTH:
+            return evaluation.evaluate(self.board)
+        scored = []
+        for move in moves:
+            capture = self.capture_score(move)
+            if not in_check and see(self.board, move) < 0:
+                self.see_pruned += 1
+                continue
+            scored.append((capture, move))
+        scored.sort(key=lambda item: -item[0])
+
+        for _, move in scored:
+            undo = self.board.push(move)
+            try:
+                score = -self.quiesce(-beta, -alpha, ply + 1)
+            finally:
+                self.board.pop(undo)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def iterate(self, max_depth: int) -> SearchResult:
+        """Search one depth deeper at a time until max_depth or a limit is reached,
+        returning the result of the deepest iteration that finished.
+        """
+
+        moves = self.board.legal_moves()
+        result = SearchResult(
+            moves[0] if moves else None,
+            0 if moves or not self.board.is_check(self.board.turn) else -MATE,
+            0,
+            0,
+            moves[:1],
+            0.0,
+        )
+        if len(moves) == 0:
+            return result
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self.negamax(depth, -MATE - 1, MATE + 1, 0)
+            except SearchTimeout:
+                break
+            self.previous_pv = self.pv[0]
+            result = SearchResult(
+                self.pv[0][0] if self.pv[0] else moves[0],
+                score,
+                depth,
+                self.nodes,
+                list(self.pv[0]),
+                time.perf_counter() - self.start,
+            )
+            if self.report:
+                self.report(result)
+            if is_mate_score(score):
+                break
+        return result._replace(nodes=self.nodes, seconds=time.perf_counter() - self.start)
+
+
+def best_move(
+    chess_board: board.ChessBoard,
+    depth: Union[None, int] = None,
+    time_limit: Union[None, float] = None,
+    nodes: Union[None, int] = None,
+    table: Union[None, tt.TranspositionTable] = None,
+    opening_book: Union[None, book.PolyglotBook] = None,
+    tablebases: Union[None, tablebase.Tablebases] = None,
+) -> SearchResult:
+    """Search for the best move for the side to move with iterative deepening.
+
+    The search goes up to "depth", and stops early after "time_limit" seconds
+    or after searching "nodes" positions, returning the best move of the deepest
+    finished iteration. Without a depth it searches until a limit is reached,
+    or to DEFAULT_DEPTH if there are no limits.
+    Passing the same transposition table to every search of a game or analysis session
+    lets later searches use what earlier ones found.
+    If the position is in "opening_book" a book move is played without searching,
+    with a depth of 0. Endgames in "tablebases" are scored from them.
+    """
+
+    if opening_book:
+        move = opening_book.choose(chess_board)
+        if move:
+            return SearchResult(move, 0, 0, 0, [move], 0.0)
+    if depth is None:
+        depth = DEFAULT_DEPTH if time_limit is None and nodes is None else MAX_DEPTH
+    return Search(
+        chess_board, time_limit, nodes, table, tablebases=tablebases
+    ).iterate(min(depth, MAX_DEPTH))
+
+
+def pv_names(chess_board: board.ChessBoard, pv: list[pieces.Move]) -> list[str]:
+    """Return the names of the moves of a principal variation, see board.move_name."""
+    names = []
+    undos = []
+    for move in pv:
+        names.append(board.move_name(move))
+        undos.append(chess_board.push(move))
+    for undo in reversed(undos):
+        chess_board.pop(undo)
+    return names
@@ -0,0 +1,264 @@
+"""Build and probe distance to mate tablebases of a king and one piece against a king,
+like KQK and KRK.
+
+A table holds a byte for every placement of the strong king, the piece and the weak king
+with either side to move. The byte is 0 for draws and positions that can not happen,
+otherwise the number of plies to mate plus one. Tables are built by retrograde analysis:
+the moves of every placement are found with ChessBoard.legal_moves, spread over a pool of
+processes, and then the results are worked backwards from the mates.
+
+The files are a HEADER_SIZE byte header followed by the bytes, and are memory mapped
+to probe them, so opening them costs nothing and probing is a single lookup.
+
+Run "python -m tablebase KQK KRK" to build tables in the "tablebases" directory.
+"""
+import argparse
+import mmap
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Union, cast
+import board
+from chess_types import ColourString, File, Rank, SymbolString
+
+MAGIC = b"FACETB1\0"
+HEADER_SIZE = 16
+PIECE_SYMBOLS: tuple[SymbolString, ...] = ("Q", "R", "B", "N")
+MATERIALS = tuple(f"K{symbol}K" for symbol in PIECE_SYMBOLS)
+# The number of entries in a table, 2 sides to move times 64 squares for each of the 3 pieces.
+TABLE_SIZE = 2 * 64 * 64 * 64
+DRAW = -1
+
+
+class ProbeResult(NamedTuple):
+    """What a table says about a position, for the side to move.
+
+    "wdl" is 1 if it wins, -1 if it loses and 0 for a draw,
+    "plies" is how many plies it takes to mate, 0 for draws.
+    """
+
+    wdl: int
+    plies: int
+
+
+def index(strong_to_move: bool, strong_king: int, piece: int, weak_king: int) -> int:
+    """Return the index into a table of a placement, squares are 0 for a1 to 63 for h8."""
+    return (((0 if strong_to_move else 1) * 64 + strong_king) * 64 + piece) * 64 + weak_king
+
+
+def _place(chess_board: board.ChessBoard, squares: tuple[int, int, int]) -> None:
+    """Put the three pieces of a generation board on squares, in the order of its pieces."""
+    chess_board.board = [[None] * 9 for _ in range(8)]
+    for piece, sq in zip(chess_board.pieces, squares):
+        piece.file = cast(File, sq & 7)
+        piece.rank = cast(Rank, (sq >> 3) + 1)
+        chess_board.board[piece.file][piece.rank] = piece
+
+
+def successors(material: str, strong_king: int) -> tuple[array, array, array, array]:
+    """Find the moves of every placement of a material with the strong king on a square.
+
+    Return the indexes of the positions that can happen, where each one's moves start
+    in the third array, which holds the indexes the moves lead to,
+    DRAW for a capture of the piece, and the positions where the weak side is mated.
+    This is the slow part of building a table,
+    and is run for each square of the strong king in a worker process.
+    """
+
+    symbol = material[1]
+    chess_board = board.ChessBoard.from_fen(f"K{symbol}6/8/8/8/8/8/8/7k w - - 0 1")
+    # the pieces come out of from_fen in the order of the FEN
+    assert [piece.symbol for piece in chess_board.pieces] == ["K", symbol, "K"]
+    positions = array("i")
+    starts = array("i")
+    moves = array("i")
+    mated = array("i")
+    king_file, king_rank = strong_king & 7, (strong_king >> 3) + 1
+    for piece_sq in range(64):
+        if piece_sq == strong_king:
+            continue
+        for weak_king in range(64):
+            if weak_king in (strong_king, piece_sq):
+                continue
+            weak_file, weak_rank = weak_king & 7, (weak_king >> 3) + 1
+            if abs(weak_file - king_file) <= 1 and abs(weak_rank - king_rank) <= 1:
+                continue
+            _place(chess_board, (strong_king, piece_sq, weak_king))
+            for strong_to_move in (True, False):
+                colour: ColourString = "w" if strong_to_move else "b"
+                if strong_to_move and chess_board.is_check("b"):
+                    # the weak king can not be in check with the strong side to move
+                    continue
+                chess_board.turn = colour
+                position = index(strong_to_move, strong_king, piece_sq, weak_king)
+                positions.append(position)
+                starts.append(len(moves))
+                legal_moves = chess_board.legal_moves()
+                if not legal_moves and not strong_to_move and chess_board.is_check("b"):
+                    mated.append(position)
+                for move in legal_moves:
+                    to_sq = (move.rank - 1) * 8 + move.file
+                    squares = [strong_king, piece_sq, weak_king]
+                    moved = chess_board.pieces.index(move.piece)
+                    if not strong_to_move and to_sq == piece_sq:
+                        moves.append(DRAW)
+                        continue
+                    squares[moved] = to_sq
+                    moves.append(index(not strong_to_move, *squares))
+    return positions, starts, moves, mated
+
+
+def generate(material: str, workers: Union[None, int] = None) -> bytearray:
+    """Return the table of a material like "KQK" as a bytearray of TABLE_SIZE bytes.
+
+    The moves of every placement are found over "workers" processes,
+    then the results are worked backwards from the positions where the weak side is mated,
+    a level of plies at a time.
+    """
+
+    if material not in MATERIALS:
+        raise ValueError(f"no tablebase for {material}, only {', '.join(MATERIALS)}")
+    with ProcessPoolExecutor(workers) as pool:
+        chunks = list(pool.map(successors, [material] * 64, range(64)))
+
+    # for the weak side, how many moves are not known to lose yet
+    remaining = array("i", bytes(4 * TABLE_SIZE))
+    predecessor_count = array("i", bytes(4 * (TABLE_SIZE + 1)))
+    values = bytearray(TABLE_SIZE)
+    frontier = []
+    for positions, starts, moves, mated in chunks:
+        for position in mated:
+            values[position] = 1
+            frontier.append(position)
+        for i, position in enumerate(positions):
+            start = starts[i]
+            end = starts[i + 1] if i + 1 < len(starts) else len(moves)
+            if position >= TABLE_SIZE // 2:
+                remaining[position] = end - start
+            for j in range(start, end):
+                if moves[j] != DRAW:
+                    predecessor_count[moves[j] + 1] += 1
+
+    # the predecessors of position p are predecessors[offsets[p]:offsets[p + 1]]
+    offsets = predecessor_count
+    for position in range(TABLE_SIZE):
+        offsets[position + 1] += offsets[position]
+    fill = array("i", offsets)
+    predecessors = array("i", bytes(4 * offsets[TABLE_SIZE]))
+    for positions, starts, moves, _ in chunks:
+        for i, position in enumerate(positions):
+            start = starts[i]
+            end = starts[i + 1] if i + 1 < len(starts) else len(moves)
+            for j in range(start, end):
+                target = moves[j]
+                if target != DRAW:
+                    predecessors[fill[target]] = position
+                    fill[target] += 1
+
+    value = 1
+    while frontier:
+        value += 1
+        next_frontier = []
+        for position in frontier:
+            for j in range(offsets[position], offsets[position + 1]):
+                previous = predecessors[j]
+                if values[previous]:
+                    continue
+                if previous < TABLE_SIZE // 2:
+                    # the strong side picks the quickest mate
+                    values[previous] = value
+                    next_frontier.append(previous)
+                else:
+                    # the weak side loses once every move loses, the last one is the slowest
+                    remaining[previous] -= 1
+                    if remaining[previous] == 0:
+                        values[previous] = value
+                        next_frontier.append(previous)
+        frontier = next_frontier
+    return values
+
+
+def write_table(path: str, material: str, values: bytes) -> None:
+    with open(path, "wb") as table_file:
+        table_file.write(MAGIC + material.encode().ljust(HEADER_SIZE - len(MAGIC), b"\0"))
+        table_file.write(values)
+
+
+class Tablebases:
+    """The tables found in a directory, memory mapped, looked up by material like "KQK"."""
+
+    def __init__(self, directory: str) -> None:
+        self.tables: dict[str, mmap.mmap] = {}
+        for material in MATERIALS:
+            path = os.path.join(directory, f"{material}.tb")
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as table_file:
+                data = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if data[: len(MAGIC)] != MAGIC or len(data) != HEADER_SIZE + TABLE_SIZE:
+                data.close()
+                raise ValueError(f"{path} is not a tablebase")
+            self.tables[material] = data
+
+    def close(self) -> None:
+        for data in self.tables.values():
+            data.close()
+        self.tables = {}
+
+    def probe(self, chess_board: board.ChessBoard) -> Union[None, ProbeResult]:
+        """Return what the tables say about a board, None if they do not have its material."""
+        if len(chess_board.pieces) != 3:
+            return None
+        strong = None
+        for piece in chess_board.pieces:
+            if piece.symbol != "K":
+                strong = piece
+        if not strong:
+            return None
+        data = self.tables.get(f"K{strong.symbol}K")
+        if data is None:
+            return None
+
+        colour = strong.colour
+        strong_king = chess_board.kings[colour]
+        weak_king = chess_board.kings["b" if colour == "w" else "w"]
+
+        def sq(piece) -> int:
+            # the tables are for white as the strong side, so black's are flipped top to bottom
+            rank = piece.rank if colour == "w" else 9 - piece.rank
+            return (rank - 1) * 8 + piece.file
+
+        strong_to_move = chess_board.turn == colour
+        value = data[
+            HEADER_SIZE + index(strong_to_move, sq(strong_king), sq(strong), sq(weak_king))
+        ]
+        if not value:
+            return ProbeResult(0, 0)
+        return ProbeResult(1 if strong_to_move else -1, value - 1)
+
+
+def main(argv: Union[None, list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tablebase", description="Build endgame tablebases by retrograde analysis."
+    )
+    parser.add_argument("materials", nargs="+", choices=MATERIALS)
+    parser.add_argument("--directory", default="tablebases")
+    parser.add_argument("--workers", type=int, help="processes to use, all the CPUs by default")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    for material in args.materials:
+        start = time.perf_counter()
+        values = generate(material, args.workers)
+        write_table(os.path.join(args.directory, f"{material}.tb"), material, values)
+        print(
+            f"{material}: longest mate {max(values) - 1} plies, "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Checks of the NumPy batch evaluation, run with "python -m pytest"."""
+import io
+
+import numpy as np
+
+import batch_eval
+import board
+import evaluation
+
+FENS = batch_eval.random_fens(100)
+
+
+def test_evaluate_batch_agrees_with_evaluate():
+    boards = [board.ChessBoard.from_fen(fen) for fen in FENS]
+    expected = [evaluation.evaluate(chess_board) for chess_board in boards]
+    assert batch_eval.evaluate_batch(*batch_eval.encode_boards(boards)).tolist() == expected
+    assert batch_eval.evaluate_batch(*batch_eval.encode_fens(FENS)).tolist() == expected
+
+
+def test_encode_fens_agrees_with_encode_boards():
+    codes, black = batch_eval.encode_fens(FENS)
+    board_codes, board_black = batch_eval.encode_boards(
+        board.ChessBoard.from_fen(fen) for fen in FENS
+    )
+    assert np.array_equal(codes, board_codes)
+    assert np.array_equal(black, board_black)
+
+
+def test_planes():
+    codes, _ = batch_eval.encode_fens([board.STARTING_FEN])
+    planes = batch_eval.planes(codes)
+    assert planes.shape == (1, 12, 64)
+    assert planes[0].sum(axis=1).tolist() == [8, 2, 2, 2, 1, 1] * 2
+
+
+def test_benchmark():
+    speeds = batch_eval.benchmark(FENS[:20], out=io.StringIO())
+    assert all(speed > 0 for speed in speeds.values())
@@ -0,0 +1,167 @@
+"""Checks of ChessBoard positions, run with "python -m pytest"."""
+import random
+
+import pytest
+
+import batch_eval
+import board
+import perft
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_fen_round_trip(backend):
+    for _, fen, _ in perft.POSITIONS:
+        assert board.new_board(backend, fen).to_fen() == fen
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "8/8/8/8/8/8/8/K6k w - e 0 1",
+        "9/8/8/8/8/8/8/K6k w - - 0 1",
+        "44p/8/8/8/8/8/8/K6k w - - 0 1",
+        "7/8/8/8/8/8/8/K6k w - - 0 1",
+        "8/8/8/8/8/8/8/K6k w - e4 0 1",
+        "8/8/8/8/8/8/8/K6k b - e6 0 1",
+        "8/8/8/8/8/8/8/K6k w - - x 1",
+        "P7/8/8/8/8/8/8/K6k w - - 0 1",
+        "8/8/8/8/8/8/8/K5kk w - - 0 1",
+        # black is in check with white to move
+        "k7/8/8/8/8/8/8/R5K1 w - - 0 1",
+        # no black pawn that just moved past e6
+        "4k3/8/8/3Pn3/8/8/8/4K3 w - e6 0 1",
+        "4k3/8/8/3P4/8/8/8/4K3 w - e6 0 1",
+        "4k3/4p3/8/3Pp3/8/8/8/4K3 w - e6 0 1",
+    ],
+)
+def test_from_fen_rejects(fen):
+    with pytest.raises(ValueError):
+        board.ChessBoard.from_fen(fen)
+
+
+def test_from_fen_en_passant():
+    chess_board = board.ChessBoard.from_fen("4k3/8/8/3Pp3/8/8/8/4K3 w - e6 0 1")
+    assert "d5e6" in {board.move_name(move) for move in chess_board.legal_moves()}
+
+
+def test_from_fen_drops_castling_without_king_or_rook():
+    chess_board = board.ChessBoard.from_fen("4k3/8/8/8/8/8/8/4K3 w KQ - 0 1")
+    assert chess_board.to_fen() == "4k3/8/8/8/8/8/8/4K3 w - - 0 1"
+    assert chess_board.key == board.ChessBoard.from_fen(chess_board.to_fen()).key
+    chess_board = board.ChessBoard.from_fen("r3k3/8/8/8/8/8/8/4K2R w KQkq - 0 1")
+    assert chess_board.to_fen() == "r3k3/8/8/8/8/8/8/4K2R w Kq - 0 1"
+
+
+def test_backends_agree_on_square_attackers():
+    for fen in [fen for _, fen, _ in perft.POSITIONS] + batch_eval.random_fens(20):
+        boards = [board.new_board(backend, fen) for backend in ("list", "bitboard")]
+        for file in board.files:
+            for rank in board.ranks:
+                for colour in ("w", "b"):
+                    found = []
+                    for chess_board in boards:
+                        # the pieces of the colour on light squares are taken off the board
+                        ignore = {
+                            piece
+                            for piece in chess_board.pieces
+                            if piece.colour == colour and (piece.file + piece.rank) % 2 == 0
+                        }
+                        attackers = chess_board.square_attackers(file, rank, colour, ignore)
+                        found.append(sorted((piece.file, piece.rank) for piece in attackers))
+                    assert found[0] == found[1], (fen, file, rank, colour)
+
+
+def state(chess_board: board.ChessBoard) -> tuple:
+    """Return everything a move changes, to compare a board before and after it."""
+    return (
+        chess_board.to_fen(),
+        [(piece.colour, piece.symbol, piece.file, piece.rank) for piece in chess_board.pieces],
+        {
+            (piece.file, piece.rank)
+            for symbols in chess_board.by_symbol.values()
+            for piece in symbols
+        },
+        chess_board.key,
+        (chess_board.mg, chess_board.eg, chess_board.phase),
+        list(chess_board.history),
+        list(getattr(chess_board, "bitboards", [])),
+    )
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_make_and_unmake_move(backend):
+    for _, fen, _ in perft.POSITIONS:
+        chess_board = board.new_board(backend, fen)
+        before = state(chess_board)
+        for move in chess_board.legal_moves():
+            undo = chess_board.make_move(*move)
+            assert chess_board.board[move.file][move.rank] is (undo.promoted or move.piece)
+            chess_board.unmake_move(undo)
+            assert state(chess_board) == before, board.move_name(move)
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_push_and_pop_a_game(backend):
+    rng = random.Random(1)
+    for _ in range(10):
+        chess_board = board.new_board(backend)
+        states, undos = [], []
+        for _ in range(80):
+            moves = chess_board.legal_moves()
+            if not moves:
+                break
+            states.append(state(chess_board))
+            undos.append(chess_board.push(rng.choice(moves)))
+        while undos:
+            chess_board.pop(undos.pop())
+            assert state(chess_board) == states.pop()
+
+
+def play(chess_board: board.ChessBoard, names: str) -> None:
+    for name in names.split():
+        chess_board.push(board.parse_move(chess_board, name))
+
+
+def test_threefold_repetition():
+    chess_board = board.ChessBoard()
+    shuffle = "g1f3 g8f6 f3g1 f6g8"
+    play(chess_board, shuffle)
+    assert chess_board.repetitions() == 1
+    assert chess_board.game_status() == "ongoing"
+    play(chess_board, shuffle)
+    assert chess_board.repetitions() == 2
+    assert chess_board.game_status() == "repetition"
+
+
+def test_pawn_moves_and_captures_reset_repetitions():
+    chess_board = board.ChessBoard()
+    play(chess_board, "g1f3 g8f6 f3g1 f6g8 e2e4 g8f6 g1f3 f6g8 f3g1")
+    assert chess_board.halfmove_clock == 4
+    assert chess_board.repetitions() == 0
+
+
+def test_fifty_moves():
+    chess_board = board.ChessBoard.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 98 80")
+    play(chess_board, "a1a2")
+    assert chess_board.game_status() == "ongoing"
+    play(chess_board, "e8d8")
+    assert chess_board.halfmove_clock == 100
+    assert chess_board.game_status() == "fifty_moves"
+    assert chess_board.fullmove_number == 81
+
+
+def test_mate_and_stalemate():
+    stalemated = board.ChessBoard.from_fen("k7/8/1Q6/8/8/8/8/K7 b - - 0 1")
+    assert stalemated.game_status() == "stalemate"
+    mated = board.ChessBoard.from_fen("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+    assert mated.game_status() == "checkmate"
+
+
+def test_piece_moves_set_the_status():
+    chess_board = board.ChessBoard()
+    for name in "f2f3 e7e5 g2g4 d8h4".split():
+        move = board.parse_move(chess_board, name)
+        assert move.piece.move(move.file, move.rank)
+    assert chess_board.status == "checkmate"
+    assert chess_board.checkmate
+    assert len(chess_board.history) == 4
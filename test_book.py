@@ -0,0 +1,67 @@
+"""Checks of Polyglot keys, moves and books, run with "python -m pytest"."""
+import random
+
+import pytest
+
+import board
+import book
+
+
+@pytest.mark.parametrize(
+    "fen, key",
+    [
+        # the keys given with the Polyglot format
+        (board.STARTING_FEN, 0x463B96181691FC9C),
+        ("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1", 0x823C9B50FD114196),
+        ("rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 2", 0x0756B94461C50FB0),
+        ("rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3", 0x22A48B5A8E47FF78),
+        ("rnbq1bnr/ppp1pkpp/8/3pPp2/8/8/PPPPKPPP/RNBQ1BNR w - - 0 4", 0x00FDD303C946BDD9),
+    ],
+)
+def test_polyglot_key(fen, key):
+    assert len(book.RANDOM64) == 781
+    for backend in ("list", "bitboard"):
+        assert book.polyglot_key(board.new_board(backend, fen)) == key
+
+
+@pytest.mark.parametrize(
+    "fen, name, code",
+    [
+        (board.STARTING_FEN, "e2e4", 0x031C),
+        ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "e1g1", 0x0107),
+        ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "e8c8", 0x0F38),
+        ("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8n", 0x1C79),
+        ("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8q", 0x4C79),
+    ],
+)
+def test_polyglot_moves(fen, name, code):
+    chess_board = board.ChessBoard.from_fen(fen)
+    move = board.parse_move(chess_board, name)
+    assert book.encode_polyglot_move(move) == code
+    assert board.move_name(book.decode_polyglot_move(chess_board, code)) == name
+
+
+def test_illegal_polyglot_move():
+    # e2e5 is not a legal move at the start
+    assert book.decode_polyglot_move(board.ChessBoard(), 0x0324) is None
+
+
+def test_write_and_read_book(tmp_path):
+    path = str(tmp_path / "book.bin")
+    chess_board = board.ChessBoard()
+    start = book.polyglot_key(chess_board)
+    e4, d4 = (
+        book.encode_polyglot_move(board.parse_move(chess_board, name)) for name in ("e2e4", "d2d4")
+    )
+    entries = [(start, e4, 3), (1, e4, 1), (start, d4, 1), (start, e4, 2), (2**64 - 1, d4, 1)]
+    assert book.write_book(path, entries) == 4
+    with book.PolyglotBook(path) as opening_book:
+        assert opening_book.find(start) == [
+            book.BookEntry(start, d4, 1, 0),
+            book.BookEntry(start, e4, 5, 0),
+        ]
+        assert opening_book.find(12345) == []
+        assert opening_book.choose(chess_board, best=True).file == board.e
+        assert opening_book.choose(chess_board, rng=random.Random(0)) is not None
+        chess_board.push(board.parse_move(chess_board, "e2e4"))
+        assert opening_book.choose(chess_board) is None
@@ -0,0 +1,55 @@
+"""Checks of the evaluation, run with "python -m pytest"."""
+import random
+
+import pytest
+
+import board
+import evaluation
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_scores_are_kept_up_to_date(backend):
+    rng = random.Random(3)
+    for _ in range(10):
+        chess_board = board.new_board(backend)
+        undos = []
+        for _ in range(100):
+            moves = chess_board.legal_moves()
+            if not moves:
+                break
+            undos.append(chess_board.push(rng.choice(moves)))
+            scores = (chess_board.mg, chess_board.eg, chess_board.phase)
+            assert scores == evaluation.compute_scores(chess_board)
+        while undos:
+            chess_board.pop(undos.pop())
+        assert (chess_board.mg, chess_board.eg, chess_board.phase) == evaluation.compute_scores(
+            chess_board
+        )
+
+
+def test_start_is_level():
+    assert evaluation.evaluate(board.ChessBoard()) == 0
+    black_to_move = board.ChessBoard.from_fen(
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 0 1"
+    )
+    assert evaluation.evaluate(black_to_move) == 0
+
+
+def test_score_is_for_the_side_to_move():
+    white = board.ChessBoard.from_fen("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1")
+    black = board.ChessBoard.from_fen("4k3/8/8/8/8/8/8/Q3K3 b - - 0 1")
+    assert evaluation.evaluate(white) > 800
+    assert evaluation.evaluate(black) == -evaluation.evaluate(white)
+
+
+def test_mirrored_positions_score_the_same():
+    for fen, mirrored in (
+        (
+            "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+            "rnbqk2r/pppp1ppp/5n2/2b1p3/4P3/2N2N2/PPPP1PPP/R1BQKB1R b KQkq - 4 4",
+        ),
+        ("8/5k2/8/8/3P4/8/8/4K3 w - - 0 1", "4k3/8/8/3p4/8/8/5K2/8 b - - 0 1"),
+    ):
+        assert evaluation.evaluate(board.ChessBoard.from_fen(fen)) == evaluation.evaluate(
+            board.ChessBoard.from_fen(mirrored)
+        )
@@ -0,0 +1,80 @@
+"""Checks of the call counters, run with "python -m pytest"."""
+import json
+
+import pytest
+
+import bitboard
+import board
+import instrument
+import perft
+
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    instrument.disable()
+    instrument.reset()
+
+
+def test_enable_and_disable_put_the_methods_back():
+    originals = {(cls, name): vars(cls)[name] for cls, name in instrument.HOT_PATHS}
+    instrument.enable()
+    assert instrument.enabled()
+    assert all(vars(cls)[name] is not originals[(cls, name)] for cls, name in originals)
+    # enabling twice does not wrap twice
+    instrument.enable()
+    instrument.disable()
+    assert not instrument.enabled()
+    assert all(vars(cls)[name] is originals[(cls, name)] for cls, name in originals)
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_counting(backend):
+    chess_board = board.new_board(backend)
+    with instrument.counting() as counters:
+        assert perft.perft(chess_board, 3) == 8902
+    cls = "BitBoard" if backend == "bitboard" else "ChessBoard"
+    # perft makes the moves of every position but the last, legality checks make a few more
+    made = counters[f"{cls}.make_move"].calls
+    assert made >= 20 + 400
+    assert counters[f"{cls}.unmake_move"].calls == made
+    assert counters[f"{cls}.generate_moves"].calls >= 1 + 20 + 400
+    assert counters[f"{cls}.generate_moves"].seconds > 0
+    assert not instrument.enabled()
+    calls = instrument.snapshot()
+    assert calls[f"{cls}.make_move"]["calls"] == made
+    json.dumps(calls)
+
+    # counting again starts from zero
+    with instrument.counting():
+        perft.perft(chess_board, 1)
+    assert f"{cls}.make_move" not in instrument.snapshot()
+
+
+def test_nested_calls_are_timed_once():
+    counter = instrument.Counter()
+
+    def recurse(depth: int) -> int:
+        return depth and wrapped(depth - 1) + 1
+
+    wrapped = instrument._counted(counter, recurse)
+    assert wrapped(5) == 5
+    assert counter.calls == 6
+    assert counter.active == 0
+
+
+def test_divide():
+    results = instrument.divide(board.ChessBoard(), 2)
+    assert sum(result["nodes"] for result in results.values()) == 400
+    assert not instrument.enabled()
+
+
+def test_main(tmp_path, capsys):
+    make_move = vars(bitboard.BitBoard)["make_move"]
+    path = tmp_path / "snapshot.json"
+    assert instrument.main(["2", "--backend", "bitboard", "--json", str(path)]) == 0
+    record = json.loads(path.read_text())
+    assert record["nodes"] == 400
+    assert "BitBoard.make_move" in record["calls"]
+    assert capsys.readouterr().out.startswith("perft 400 nodes")
+    assert vars(bitboard.BitBoard)["make_move"] is make_move
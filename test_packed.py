@@ -0,0 +1,48 @@
+"""Checks of packed positions and position files, run with "python -m pytest"."""
+import pytest
+
+import batch_eval
+import board
+import packed
+
+FENS = batch_eval.random_fens(50) + [
+    "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+    "4k3/8/8/8/3Pp3/8/8/4K3 b - d3 0 1",
+]
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_positions_come_back_the_same(backend):
+    for fen in FENS:
+        data = packed.encode_position(board.new_board(backend, fen))
+        assert len(data) == packed.RECORD_SIZE
+        assert packed.decode_fen(data) == fen
+        assert packed.decode_position(data, backend).to_fen() == fen
+
+
+def test_clocks_are_kept_to_their_bytes():
+    data = packed.encode_position(board.ChessBoard.from_fen("4k3/8/8/8/8/8/8/4K3 w - - 300 70000"))
+    assert packed.decode_fen(data) == "4k3/8/8/8/8/8/8/4K3 w - - 255 65535"
+
+
+def test_position_file(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    boards = [board.ChessBoard.from_fen(fen) for fen in FENS]
+    with packed.PositionFile(path) as positions:
+        assert positions.append(boards[:10]) == 10
+        first = positions[0]
+        # appending while a record is held maps the file again without breaking the record
+        assert positions.append(boards[10:]) == len(boards) - 10
+        assert len(positions) == len(boards)
+        assert packed.decode_fen(first) == FENS[0]
+        assert [packed.decode_fen(data) for data in positions] == FENS
+        assert positions.board(-1).to_fen() == boards[-1].to_fen()
+        with pytest.raises(IndexError):
+            positions[len(boards)]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not positions at all")
+    with pytest.raises(ValueError):
+        packed.PositionFile(str(path))
@@ -0,0 +1,76 @@
+"""Checks of the parallel root search, run with "python -m pytest"."""
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+import pytest
+
+import board
+import parallel
+import perft
+import search
+
+
+class InlineExecutor(Executor):
+    """Runs every job as it is submitted, so the results of a root search
+    all come back at once and are handled in one go, the order that makes stale windows matter.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@pytest.mark.parametrize("name, fen", [(name, fen) for name, fen, _ in perft.POSITIONS])
+def test_parallel_search_agrees_with_best_move(name, fen):
+    chess_board = board.ChessBoard.from_fen(fen)
+    expected = search.best_move(chess_board, depth=3)
+    result = parallel.parallel_best_move(chess_board, depth=3, executor=InlineExecutor())
+    assert (result.score, result.depth) == (expected.score, 3)
+
+
+def test_parallel_search_in_processes():
+    chess_board = board.ChessBoard.from_fen(perft.POSITIONS[1][1])
+    expected = search.best_move(chess_board, depth=2)
+    result = parallel.parallel_best_move(chess_board, depth=2, workers=2)
+    assert (result.score, result.depth) == (expected.score, 2)
+
+
+def test_workers_see_repetitions():
+    chess_board = board.ChessBoard()
+    for name in ("g1f3", "g8f6", "f3g1"):
+        chess_board.push(board.parse_move(chess_board, name))
+    code = board.encode_move(board.parse_move(chess_board, "f6g8"))
+    history = chess_board.history[-chess_board.halfmove_clock :]
+    outcome = parallel.search_root_move(
+        chess_board.to_fen(), history, code, 2, -search.MATE - 1, search.MATE + 1, None
+    )
+    assert outcome and outcome.score == 0
+
+
+def test_late_fail_high_is_searched_again(monkeypatch):
+    """A move that fails high on an old null window is searched again
+    even after another move has raised alpha above the bound it came back with.
+    """
+
+    chess_board = board.ChessBoard.from_fen("k7/8/8/8/8/8/8/K7 w - - 0 1")
+    first = board.encode_move(search.best_move(chess_board, depth=1).move)
+    fast, slow = [
+        board.encode_move(move)
+        for move in chess_board.legal_moves()
+        if board.encode_move(move) != first
+    ]
+    scores = {first: 0, fast: 50, slow: 100}
+
+    def search_root_move(fen, history, code, depth, alpha, beta, time_limit):
+        if code == slow and beta == alpha + 1:
+            # the null window of this move comes back after the other move's re-search
+            time.sleep(0.2)
+        score = min(max(scores[code], alpha), beta)
+        return parallel.RootResult(code, score, 1, [])
+
+    monkeypatch.setattr(parallel, "search_root_move", search_root_move)
+    with ThreadPoolExecutor(4) as pool:
+        result = parallel.parallel_best_move(chess_board, depth=2, executor=pool)
+    assert result.move and board.encode_move(result.move) == slow
+    assert result.score == 100
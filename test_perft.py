@@ -0,0 +1,40 @@
+"""Checks of move generation by perft, run with "python -m pytest"."""
+import io
+
+import pytest
+
+import board
+import perft
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_suite(backend):
+    out = io.StringIO()
+    assert perft.run_suite(3, backend, out=out)
+    assert out.getvalue().count(" ok\n") == 3 * len(perft.POSITIONS)
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_divide_adds_up(backend):
+    _, fen, counts = perft.POSITIONS[1]
+    chess_board = board.new_board(backend, fen)
+    divided = perft.divide(chess_board, 2)
+    assert len(divided) == counts[0]
+    assert sum(divided.values()) == counts[1]
+
+
+def test_backends_give_the_same_moves():
+    for _, fen, _ in perft.POSITIONS:
+        boards = [board.new_board(backend, fen) for backend in ("list", "bitboard")]
+        for move in boards[0].legal_moves():
+            names = []
+            for chess_board in boards:
+                undo = chess_board.push(board.parse_move(chess_board, board.move_name(move)))
+                names.append(sorted(board.move_name(reply) for reply in chess_board.legal_moves()))
+                chess_board.pop(undo)
+            assert names[0] == names[1], board.move_name(move)
+
+
+def test_main(capsys):
+    assert perft.main(["2", "--fen", perft.POSITIONS[2][1]]) == 0
+    assert capsys.readouterr().out.startswith(f"nodes {perft.POSITIONS[2][2][1]}\n")
@@ -0,0 +1,85 @@
+"""Checks of reading and analysing PGN archives, run with "python -m pytest"."""
+import io
+import json
+
+import pytest
+
+import board
+import pgn
+
+ARCHIVE = """[Event "First"]
+[Result "1-0"]
+
+1. e4 {best by test} e5 2. Qh5 (2. Nf3 Nc6) Nc6 3. Bc4 Nf6?? 4. Qxf7# 1-0
+
+[Event "Second"]
+[FEN "4k3/8/8/8/8/8/8/4K2R w K - 0 1"]
+
+1. O-O Kd7 *
+"""
+
+
+def test_read_games():
+    first, second = pgn.read_games(io.StringIO(ARCHIVE))
+    assert first.headers == {"Event": "First", "Result": "1-0"}
+    assert first.moves == ["e4", "e5", "Qh5", "Nc6", "Bc4", "Nf6??", "Qxf7#"]
+    assert first.result == "1-0"
+    assert second.headers["FEN"] == "4k3/8/8/8/8/8/8/4K2R w K - 0 1"
+    assert (second.moves, second.result) == (["O-O", "Kd7"], "*")
+
+
+@pytest.mark.parametrize(
+    "fen, san, name",
+    [
+        (board.STARTING_FEN, "Nf3", "g1f3"),
+        ("4k3/8/8/8/8/8/8/4K2R w K - 0 1", "O-O", "e1g1"),
+        ("4k3/8/8/8/8/8/8/4K2R w K - 0 1", "0-0", "e1g1"),
+        ("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1", "Rad1", "a1d1"),
+        ("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1", "Rhf1+", "h1f1"),
+        ("3rk3/2P5/8/8/8/8/8/4K3 w - - 0 1", "cxd8=N", "c7d8n"),
+        ("3rk3/2P5/8/8/8/8/8/4K3 w - - 0 1", "cxd8", "c7d8q"),
+    ],
+)
+def test_parse_san(fen, san, name):
+    assert board.move_name(pgn.parse_san(board.ChessBoard.from_fen(fen), san)) == name
+
+
+@pytest.mark.parametrize(
+    "fen, san",
+    [
+        (board.STARTING_FEN, "Nd4"),
+        (board.STARTING_FEN, "O-O"),
+        (board.STARTING_FEN, "Zz9"),
+        ("4k3/8/8/8/8/8/4K3/R6R w - - 0 1", "Rd1"),
+    ],
+)
+def test_parse_san_rejects(fen, san):
+    with pytest.raises(pgn.PGNError):
+        pgn.parse_san(board.ChessBoard.from_fen(fen), san)
+
+
+def test_analyse_game_with_a_bad_fen():
+    game = pgn.Game({"FEN": "4k3/8/8/8/8/8/8/8 w - - 0 1"}, ["Kd7"], "*")
+    record = pgn.analyse_game(game, 1)
+    assert record["moves"] == []
+    assert record["error"].startswith("FEN tag")
+
+
+def test_analyse_game_stops_at_an_illegal_move():
+    game = pgn.Game({}, ["e4", "e5", "Ke3"], "*")
+    record = pgn.analyse_game(game, 1)
+    assert [move["move"] for move in record["moves"]] == ["e2e4", "e7e5"]
+    assert record["error"] == "ply 3: illegal move Ke3"
+
+
+def test_one_bad_game_does_not_stop_the_archive():
+    archive = '[FEN "not a fen"]\n\n1. e4 *\n\n' + ARCHIVE
+    out = io.StringIO()
+    games, positions, _ = pgn.analyse_archive(
+        io.StringIO(archive), out, depth=1, workers=2, table_mb=1, log=io.StringIO()
+    )
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert games == 3
+    assert "error" in records[0]
+    assert [len(record["moves"]) for record in records[1:]] == [7, 2]
+    assert positions == 9
@@ -0,0 +1,96 @@
+"""Checks of the search, run with "python -m pytest"."""
+from functools import partial
+
+import pytest
+
+import board
+import search
+
+
+@pytest.mark.parametrize(
+    "fen, name, score",
+    [
+        ("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5", 100),
+        ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -220),
+        ("4k3/8/8/3r4/4P3/8/8/4K3 w - - 0 1", "e4d5", 500),
+    ],
+)
+def test_see(fen, name, score):
+    chess_board = board.ChessBoard.from_fen(fen)
+    assert search.see(chess_board, board.parse_move(chess_board, name)) == score
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_mate_in_one(backend):
+    chess_board = board.new_board(backend, "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    for depth in (1, 3):
+        result = search.best_move(chess_board, depth=depth)
+        assert board.move_name(result.move) == "a1a8"
+        assert result.score == search.MATE - 1
+
+
+def test_quiesce_finds_mate_and_stalemate():
+    mated = search.Search(board.ChessBoard.from_fen("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1"))
+    assert mated.quiesce(-search.MATE - 1, search.MATE + 1, 3) == -search.MATE + 3
+    stalemated = search.Search(board.ChessBoard.from_fen("k7/8/1Q6/8/8/8/8/K7 b - - 0 1"))
+    assert stalemated.quiesce(-search.MATE - 1, search.MATE + 1, 3) == 0
+
+
+def test_search_does_not_stalemate_at_the_horizon():
+    # Qb6 would leave black without a move
+    chess_board = board.ChessBoard.from_fen("k7/8/8/1Q6/8/8/8/K7 w - - 0 1")
+    result = search.best_move(chess_board, depth=1)
+    assert board.move_name(result.move) != "b5b6"
+    assert result.score > 0
+
+
+def test_cutoffs_fill_killers_and_history():
+    searcher = search.Search(board.ChessBoard())
+    move = partial(board.parse_move, searcher.board)
+    searcher.add_cutoff(move("g1f3"), 2, 3, True)
+    searcher.add_cutoff(move("b1c3"), 2, 4, False)
+    searcher.add_cutoff(move("b1c3"), 2, 1, False)
+    assert searcher.killers[2] == [move("b1c3"), move("g1f3")]
+    assert searcher.killers[1] == [None, None]
+    assert searcher.history[board.encode_move(move("g1f3")) & 4095] == 9
+    assert searcher.history[board.encode_move(move("b1c3")) & 4095] == 17
+    assert (searcher.cutoffs, searcher.first_move_cutoffs) == (3, 1)
+
+    searcher.history[board.encode_move(move("e2e4")) & 4095] = search.MAX_HISTORY
+    searcher.add_cutoff(move("e2e4"), 5, 2, False)
+    # going over the limit halves every score
+    assert searcher.history[board.encode_move(move("e2e4")) & 4095] == (
+        search.MAX_HISTORY + 4
+    ) // 2
+    assert searcher.history[board.encode_move(move("g1f3")) & 4095] == 4
+
+
+def test_captures_do_not_become_killers():
+    searcher = search.Search(board.ChessBoard.from_fen("4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1"))
+    searcher.add_cutoff(board.parse_move(searcher.board, "e4d5"), 0, 3, True)
+    assert searcher.killers[0] == [None, None]
+    assert not any(searcher.history)
+    assert searcher.cutoffs == 1
+
+
+def test_move_order():
+    searcher = search.Search(board.ChessBoard.from_fen("4k3/8/1p6/2pr4/4P3/3N4/8/4K3 w - - 0 1"))
+    move = partial(board.parse_move, searcher.board)
+    searcher.add_cutoff(move("e1f2"), 0, 1, False)
+    searcher.history[board.encode_move(move("d3f4")) & 4095] = 100
+    names = [board.move_name(m) for m in searcher.ordered_moves(0, move("e1d2"))]
+    # the hash move, taking the rook, the killer, the history move, the other quiet moves
+    # and last taking a defended pawn with the knight
+    assert names[:4] == ["e1d2", "e4d5", "e1f2", "d3f4"]
+    assert names[-1] == "d3c5"
+    assert sorted(names) == sorted(board.move_name(m) for m in searcher.board.legal_moves())
+
+
+def test_search_keeps_ordering_statistics():
+    searcher = search.Search(board.ChessBoard())
+    searcher.iterate(3)
+    stats = searcher.stats()
+    assert stats["cutoffs"] > 0
+    assert 0 < stats["first_move_cutoff_rate"] <= 1
+    assert any(searcher.history)
+    assert any(killer for killers in searcher.killers for killer in killers)
@@ -0,0 +1,62 @@
+"""Checks of the endgame tablebases, run with "python -m pytest"."""
+import pytest
+
+import board
+import search
+import tablebase
+
+# a1, b6, h1, a8 and the rook on h1 in "k7/8/1K6/8/8/8/8/7R"
+A1, B6, H1, A8 = 0, 41, 7, 56
+
+
+def test_successors_find_the_mates():
+    positions, starts, moves, mated = tablebase.successors("KRK", B6)
+    # Rh8 is mate with the king on b6 and the black king on a8
+    assert tablebase.index(False, B6, 63, A8) in mated
+    assert tablebase.index(True, B6, H1, A8) in positions
+    assert len(starts) == len(positions)
+    assert all(0 <= move < tablebase.TABLE_SIZE or move == tablebase.DRAW for move in moves)
+
+
+@pytest.fixture
+def tablebases(tmp_path):
+    values = bytearray(tablebase.TABLE_SIZE)
+    # white to move mates in one ply, with Rh8, after which black is mated
+    values[tablebase.index(True, B6, H1, A8)] = 2
+    values[tablebase.index(False, B6, 63, A8)] = 1
+    tablebase.write_table(str(tmp_path / "KRK.tb"), "KRK", values)
+    opened = tablebase.Tablebases(str(tmp_path))
+    yield opened
+    opened.close()
+
+
+def test_probe(tablebases):
+    probe = tablebases.probe
+    assert probe(board.ChessBoard.from_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1")) == (1, 1)
+    # the same position with the colours swapped, black is the strong side
+    assert probe(board.ChessBoard.from_fen("7r/8/8/8/8/1k6/8/K7 b - - 0 1")) == (1, 1)
+    assert probe(board.ChessBoard.from_fen("7r/8/8/8/8/1k6/8/K7 w - - 0 1")) == (0, 0)
+    assert probe(board.ChessBoard.from_fen("k7/8/1K6/8/8/8/8/6Q1 w - - 0 1")) is None
+    assert probe(board.ChessBoard()) is None
+
+
+def test_search_uses_the_tablebases(tablebases):
+    searcher = search.Search(
+        board.ChessBoard.from_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1"), tablebases=tablebases
+    )
+    result = searcher.iterate(1)
+    # every move is looked up, every position but the mate is a draw in this table
+    assert board.move_name(result.move) == "h1h8"
+    assert result.score == search.MATE - 1
+    assert searcher.tb_hits == len(searcher.board.legal_moves())
+
+
+def test_rejects_other_files(tmp_path):
+    (tmp_path / "KQK.tb").write_bytes(b"not a table")
+    with pytest.raises(ValueError):
+        tablebase.Tablebases(str(tmp_path))
+
+
+def test_unknown_material():
+    with pytest.raises(ValueError):
+        tablebase.generate("KPK")
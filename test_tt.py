@@ -0,0 +1,70 @@
+"""Checks of the transposition table, run with "python -m pytest"."""
+import board
+import search
+import tt
+
+SIZE_MB = 1 / 1024
+
+
+def test_size_is_fixed():
+    table = tt.TranspositionTable(SIZE_MB)
+    assert table.size == 64
+    for key in range(1, 1000):
+        table.store(key, 1, tt.EXACT, 0, 0)
+    assert len(table.keys) == len(table.data) == 64
+    assert table.fill() == 1.0
+    assert table.hashfull() == 1000
+
+
+def test_store_and_probe():
+    table = tt.TranspositionTable(SIZE_MB)
+    assert table.probe(5) is None
+    table.store(5, 7, tt.LOWER, -1234, 0x1234)
+    assert table.probe(5) == tt.TTEntry(7, tt.LOWER, -1234, 0x1234)
+    # the same slot but another position
+    assert table.probe(5 + table.size) is None
+    assert table.stats() == {
+        "size": 64,
+        "probes": 3,
+        "hits": 1,
+        "stores": 1,
+        "hit_rate": 1 / 3,
+        "fill": 1 / 64,
+    }
+
+
+def test_replacement():
+    table = tt.TranspositionTable(SIZE_MB)
+    other = 5 + table.size
+    table.store(5, 6, tt.EXACT, 10, 1)
+    # a shallower search of another position does not push out a deeper one of the same search
+    table.store(other, 3, tt.EXACT, 20, 2)
+    assert table.probe(5) == tt.TTEntry(6, tt.EXACT, 10, 1)
+    table.store(other, 6, tt.EXACT, 20, 2)
+    assert table.probe(other) == tt.TTEntry(6, tt.EXACT, 20, 2)
+    # anything replaces an entry from an earlier search
+    table.new_search()
+    table.store(5, 1, tt.UPPER, 30, 3)
+    assert table.probe(5) == tt.TTEntry(1, tt.UPPER, 30, 3)
+    # the same position keeps its best move when a search stores none
+    table.store(5, 2, tt.UPPER, 40, 0)
+    assert table.probe(5) == tt.TTEntry(2, tt.UPPER, 40, 3)
+    assert table.stats()["stores"] == 4
+
+
+def test_clear():
+    table = tt.TranspositionTable(SIZE_MB)
+    table.store(5, 1, tt.EXACT, 0, 0)
+    table.probe(5)
+    table.clear()
+    assert table.probe(5) is None
+    assert (table.used, table.hits, table.stores) == (0, 0, 0)
+
+
+def test_search_fills_and_reuses_the_table():
+    table = tt.TranspositionTable(1)
+    first = search.best_move(board.ChessBoard(), depth=3, table=table)
+    assert table.stores and table.used
+    second = search.best_move(board.ChessBoard(), depth=3, table=table)
+    assert second.score == first.score
+    assert second.nodes < first.nodes
@@ -0,0 +1,63 @@
+"""Checks of the UCI front end, run with "python -m pytest"."""
+import asyncio
+import io
+import time
+
+import pytest
+
+import uci
+
+
+def test_parse_go():
+    options = uci.parse_go("wtime 1000 btime 2000 winc 10 ponder depth 5 searchmoves e2e4".split())
+    assert options == {"wtime": 1000, "btime": 2000, "winc": 10, "ponder": 1, "depth": 5}
+
+
+@pytest.mark.parametrize("words", [["depth", "x"], ["wtime", "1.5"]])
+def test_parse_go_rejects(words):
+    with pytest.raises(ValueError):
+        uci.parse_go(words)
+
+
+def test_allot_time():
+    assert uci.allot_time({}, "w") is None
+    assert uci.allot_time({"movetime": 1000}, "b") == pytest.approx(1 - uci.MOVE_OVERHEAD)
+    assert uci.allot_time({"wtime": 60000, "movestogo": 10}, "w") == pytest.approx(6)
+    assert uci.allot_time({"wtime": 60000, "btime": 3000, "binc": 2000}, "b") == pytest.approx(
+        1.5 - uci.MOVE_OVERHEAD
+    )
+
+
+def test_ponderhit_gives_the_whole_time_from_then_on():
+    async def play() -> tuple[float, float, str]:
+        engine = uci.UCIEngine(io.StringIO())
+        engine.loop = asyncio.get_running_loop()
+        await engine.handle("go ponder movetime 300")
+        await asyncio.sleep(0.5)
+        # still pondering, so no bestmove yet however long it took
+        assert "bestmove" not in engine.out.getvalue()
+        hit = time.perf_counter()
+        await engine.handle("ponderhit")
+        assert engine.searcher and engine.searcher.time_limit is not None
+        deadline = engine.searcher.start + engine.searcher.time_limit
+        await engine.search_task
+        return deadline - hit, time.perf_counter() - hit, engine.out.getvalue()
+
+    allotted, took, out = asyncio.run(play())
+    assert allotted == pytest.approx(0.3 - uci.MOVE_OVERHEAD, abs=0.05)
+    assert took < 2
+    assert out.splitlines()[-1].startswith("bestmove")
+
+
+def test_bad_go_is_answered():
+    async def play() -> str:
+        engine = uci.UCIEngine(io.StringIO())
+        engine.loop = asyncio.get_running_loop()
+        await engine.handle("go depth x")
+        await engine.handle("go depth 1")
+        await engine.stop()
+        return engine.out.getvalue()
+
+    out = asyncio.run(play())
+    assert out.splitlines()[0] == "info string depth should be a number, not x"
+    assert out.splitlines()[-1].startswith("bestmove")
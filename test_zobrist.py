@@ -0,0 +1,50 @@
+"""Checks of the Zobrist keys kept by boards, run with "python -m pytest"."""
+import random
+
+import pytest
+
+import board
+import zobrist
+
+
+def play(chess_board: board.ChessBoard, names: str) -> None:
+    for name in names.split():
+        chess_board.push(board.parse_move(chess_board, name))
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+def test_key_is_kept_up_to_date(backend):
+    rng = random.Random(2)
+    for _ in range(10):
+        chess_board = board.new_board(backend)
+        for _ in range(100):
+            moves = chess_board.legal_moves()
+            if not moves:
+                break
+            chess_board.push(rng.choice(moves))
+            assert chess_board.key == zobrist.compute_key(chess_board)
+            assert chess_board.key == board.ChessBoard.from_fen(chess_board.to_fen()).key
+
+
+def test_transpositions_have_the_same_key():
+    first, second = board.ChessBoard(), board.ChessBoard()
+    play(first, "g1f3 g8f6 b1c3")
+    play(second, "b1c3 g8f6 g1f3")
+    assert first.key == second.key
+    play(first, "f6g8 f3g1 g8f6 g1f3")
+    assert first.key == second.key
+
+
+def test_key_holds_turn_castling_and_en_passant():
+    keys = {
+        board.ChessBoard.from_fen(fen).key
+        for fen in (
+            "r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1",
+            "r3k2r/8/8/8/3p4/8/4P3/R3K2R b KQkq - 0 1",
+            "r3k2r/8/8/8/3p4/8/4P3/R3K2R w Kkq - 0 1",
+            "r3k2r/8/8/8/3p4/8/4P3/R3K2R w - - 0 1",
+            "r3k2r/8/8/8/3pP3/8/8/R3K2R b KQkq e3 0 1",
+            "r3k2r/8/8/8/3pP3/8/8/R3K2R b KQkq - 0 1",
+        )
+    }
+    assert len(keys) == 6
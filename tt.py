@@ -0,0 +1,122 @@
+from array import array
+from typing import NamedTuple, Union
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 31
+
+
+class TTEntry(NamedTuple):
+    """What is known about a position from an earlier search.
+
+    "bound" is EXACT if "score" is the score of the position,
+    LOWER if it is at least "score" and UPPER if it is at most "score".
+    "move" is the best move as given by board.encode_move, 0 if there is none.
+    """
+
+    depth: int
+    bound: int
+    score: int
+    move: int
+
+
+class TranspositionTable:
+    """A fixed size hash table of searched positions, indexed by their Zobrist key.
+
+    It is two preallocated arrays of 64 bit ints, one with the keys
+    and one with the entries packed into an int, so the memory it takes
+    is set when it is made and does not grow while searching.
+
+    The packed entry holds the move in bits 0-15, the depth in bits 16-23,
+    the bound in bits 24-25, the age in bits 26-31 and the score plus SCORE_OFFSET in bits 32-63.
+
+    When two positions land on the same slot the new one replaces the old one
+    if the old one is from an earlier search (see new_search) or was not searched deeper.
+    """
+
+    def __init__(self, size_mb: float = 16) -> None:
+        entries = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        # round down to a power of two so the index is just the low bits of the key
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.keys = array("Q", bytes(8 * self.size))
+        self.data = array("Q", bytes(8 * self.size))
+        self.age = 0
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self) -> None:
+        self.keys = array("Q", bytes(8 * self.size))
+        self.data = array("Q", bytes(8 * self.size))
+        self.age = 0
+        self.used = 0
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self) -> None:
+        """Start a new search, making the entries of earlier ones the first to be replaced."""
+        self.age = (self.age + 1) & 63
+
+    def probe(self, key: int) -> Union[None, TTEntry]:
+        """Return the entry of a position, or None if it is not in the table."""
+        self.probes += 1
+        index = key & self.mask
+        if self.keys[index] != key:
+            return None
+        self.hits += 1
+        data = self.data[index]
+        return TTEntry(
+            data >> 16 & 255,
+            data >> 24 & 3,
+            (data >> 32) - SCORE_OFFSET,
+            data & 0xFFFF,
+        )
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: int) -> None:
+        """Save what a search found about a position, if the replacement scheme allows it."""
+        index = key & self.mask
+        stored_key = self.keys[index]
+        if stored_key and stored_key != key:
+            stored = self.data[index]
+            if stored >> 26 & 63 == self.age and stored >> 16 & 255 > depth:
+                return
+        elif not stored_key:
+            self.used += 1
+        elif not move:
+            # keep the best move of an earlier search of the same position
+            move = self.data[index] & 0xFFFF
+        self.stores += 1
+        self.keys[index] = key
+        self.data[index] = (
+            move
+            | min(max(depth, 0), 255) << 16
+            | bound << 24
+            | self.age << 26
+            | (score + SCORE_OFFSET) << 32
+        )
+
+    def hit_rate(self) -> float:
+        """Return the share of probes that found their position."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self) -> float:
+        """Return the share of slots that are in use."""
+        return self.used / self.size
+
+    def hashfull(self) -> int:
+        """Return how full the table is in permille, as UCI reports it."""
+        return int(self.fill() * 1000)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate(),
+            "fill": self.fill(),
+        }
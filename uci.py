@@ -0,0 +1,339 @@
+"""Speak the UCI protocol over stdin and stdout, so FACE can be run from chess GUIs
+and tournament managers.
+
+Run it with "python -m uci".
+The search runs in a thread next to the asyncio loop that reads the commands,
+so "stop", "isready" and "ponderhit" are answered while it is thinking.
+"""
+import asyncio
+import sys
+import threading
+import time
+from typing import Union
+import board
+import book
+import search
+import tablebase
+import tt
+
+NAME = "FACE"
+AUTHOR = "the FACE contributors"
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+# Seconds kept back from every move for the time it takes to read and answer commands.
+MOVE_OVERHEAD = 0.05
+# How many moves the remaining time is split over when the GUI does not say.
+DEFAULT_MOVES_TO_GO = 30
+
+GO_FLAGS = ("infinite", "ponder")
+GO_VALUES = ("wtime", "btime", "winc", "binc", "movestogo", "depth", "nodes", "movetime")
+
+
+def score_string(score: int) -> str:
+    """Return a score as UCI gives it, "cp" in centipawns or "mate" in moves."""
+    if search.is_mate_score(score):
+        moves = (search.MATE - abs(score) + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+def info_line(
+    chess_board: board.ChessBoard,
+    result: search.SearchResult,
+    table: tt.TranspositionTable,
+) -> str:
+    """Return the "info" line of a finished iteration of a search of the board."""
+    nps = int(result.nodes / result.seconds) if result.seconds else 0
+    return (
+        f"info depth {result.depth} score {score_string(result.score)} "
+        f"nodes {result.nodes} nps {nps} time {int(result.seconds * 1000)} "
+        f"hashfull {table.hashfull()} pv {' '.join(search.pv_names(chess_board, result.pv))}"
+    )
+
+
+def parse_go(words: list[str]) -> dict[str, int]:
+    """Return the options of a "go" command by name, flags like "infinite" are set to 1.
+
+    Raise ValueError if an option that takes a number is not given one.
+    """
+    options = {}
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word in GO_FLAGS:
+            options[word] = 1
+        elif word in GO_VALUES and i + 1 < len(words):
+            i += 1
+            try:
+                options[word] = int(words[i])
+            except ValueError:
+                raise ValueError(f"{word} should be a number, not {words[i]}") from None
+        i += 1
+    return options
+
+
+def allot_time(options: dict[str, int], turn: str) -> Union[None, float]:
+    """Return the seconds to spend on a move from the options of a "go" command,
+    None if there is no time limit.
+    """
+
+    if "movetime" in options:
+        return max(options["movetime"] / 1000 - MOVE_OVERHEAD, 0.01)
+    remaining = options.get("wtime" if turn == "w" else "btime")
+    if remaining is None:
+        return None
+    increment = options.get("winc" if turn == "w" else "binc", 0) / 1000
+    remaining /= 1000
+    moves_to_go = options.get("movestogo", DEFAULT_MOVES_TO_GO)
+    limit = remaining / max(moves_to_go, 1) + increment * 3 / 4
+    return max(min(limit, remaining / 2 - MOVE_OVERHEAD), 0.01)
+
+
+class UCIEngine:
+    """Answers the UCI commands read from a stream, writing to "out".
+
+    "board" is the position set by the last "position" command
+    and "table" the transposition table shared by every search until "ucinewgame".
+    """
+
+    def __init__(self, out=sys.stdout) -> None:
+        self.out = out
+        self.board = board.ChessBoard()
+        self.hash_mb = DEFAULT_HASH_MB
+        self.table = tt.TranspositionTable(self.hash_mb)
+        self.searcher: Union[None, search.Search] = None
+        self.search_task: Union[None, asyncio.Task] = None
+        self.stop_event = threading.Event()
+        # set when a finished search of "go infinite" or "go ponder" may send its bestmove
+        self.release = asyncio.Event()
+        self.pondering = False
+        self.ponder_limit: Union[None, float] = None
+        self.loop: Union[None, asyncio.AbstractEventLoop] = None
+        self.book: Union[None, book.PolyglotBook] = None
+        self.book_path = ""
+        self.tablebases: Union[None, tablebase.Tablebases] = None
+
+    def write(self, line: str) -> None:
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    def write_threadsafe(self, line: str) -> None:
+        """Write a line from the search thread, through the loop."""
+        assert self.loop
+        self.loop.call_soon_threadsafe(self.write, line)
+
+    async def run(self, stream=sys.stdin) -> None:
+        """Read and answer commands until "quit" or the end of the stream."""
+        self.loop = asyncio.get_running_loop()
+        while True:
+            line = await self.loop.run_in_executor(None, stream.readline)
+            if not line:
+                break
+            if not await self.handle(line):
+                break
+        await self.stop()
+
+    async def handle(self, line: str) -> bool:
+        """Answer one command, return False if it was "quit"."""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == "quit":
+            return False
+        if command == "uci":
+            self.write(f"id name {NAME}")
+            self.write(f"id author {AUTHOR}")
+            self.write(
+                f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}"
+            )
+            self.write("option name Ponder type check default false")
+            self.write("option name BookFile type string default <empty>")
+            self.write("option name TablebasePath type string default <empty>")
+            self.write("uciok")
+        elif command == "isready":
+            self.write("readyok")
+        elif command == "ucinewgame":
+            await self.stop()
+            self.table = tt.TranspositionTable(self.hash_mb)
+            self.board = board.ChessBoard()
+        elif command == "setoption":
+            await self.set_option(args)
+        elif command == "position":
+            await self.stop()
+            self.set_position(args)
+        elif command == "go":
+            await self.stop()
+            try:
+                options = parse_go(args)
+            except ValueError as error:
+                self.write(f"info string {error}")
+                return True
+            self.go(options)
+        elif command == "stop":
+            await self.stop()
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command in ("debug", "register"):
+            pass
+        else:
+            self.write(f"info string unknown command {command}")
+        return True
+
+    async def set_option(self, args: list[str]) -> None:
+        if "name" not in args or "value" not in args:
+            return
+        name = " ".join(args[args.index("name") + 1 : args.index("value")])
+        value = " ".join(args[args.index("value") + 1 :])
+        if name.lower() == "hash":
+            try:
+                hash_mb = int(value)
+            except ValueError:
+                self.write(f"info string Hash should be a number of MB, not {value}")
+                return
+            await self.stop()
+            self.hash_mb = min(max(hash_mb, 1), MAX_HASH_MB)
+            self.table = tt.TranspositionTable(self.hash_mb)
+        elif name.lower() == "bookfile":
+            self.book_path = "" if value == "<empty>" else value
+            self.open_book()
+        elif name.lower() == "tablebasepath":
+            await self.stop()
+            if self.tablebases:
+                self.tablebases.close()
+                self.tablebases = None
+            if value and value != "<empty>":
+                try:
+                    self.tablebases = tablebase.Tablebases(value)
+                except (OSError, ValueError) as error:
+                    self.write(f"info string can not open tablebases: {error}")
+
+    def open_book(self) -> None:
+        if self.book:
+            self.book.close()
+            self.book = None
+        if not self.book_path:
+            return
+        try:
+            self.book = book.PolyglotBook(self.book_path)
+        except (OSError, ValueError) as error:
+            self.write(f"info string can not open book: {error}")
+
+    def set_position(self, args: list[str]) -> None:
+        """Set the board from "startpos" or "fen ..." and play the moves after "moves"."""
+        moves = []
+        if "moves" in args:
+            moves = args[args.index("moves") + 1 :]
+            args = args[: args.index("moves")]
+        try:
+            if args and args[0] == "fen":
+                chess_board = board.ChessBoard.from_fen(" ".join(args[1:]))
+            else:
+                chess_board = board.ChessBoard()
+        except ValueError as error:
+            self.write(f"info string {error}")
+            return
+        for name in moves:
+            move = board.parse_move(chess_board, name)
+            if not move:
+                self.write(f"info string illegal move {name}")
+                break
+            chess_board.push(move)
+        self.board = chess_board
+
+    def go(self, options: dict[str, int]) -> None:
+        """Start searching the current position in the background,
+        or answer straight away with a book move.
+        """
+        if self.book and "infinite" not in options and "ponder" not in options:
+            move = self.book.choose(self.board)
+            if move:
+                self.write(f"bestmove {board.move_name(move)}")
+                return
+        time_limit = allot_time(options, self.board.turn)
+        self.pondering = "ponder" in options
+        self.ponder_limit = time_limit
+        waits = self.pondering or "infinite" in options
+        self.stop_event = threading.Event()
+        self.release = asyncio.Event()
+        if not waits:
+            self.release.set()
+
+        search_board = self.board.copy()
+        table = self.table
+        self.searcher = search.Search(
+            search_board,
+            None if waits else time_limit,
+            options.get("nodes"),
+            table,
+            self.stop_event,
+            lambda result: self.write_threadsafe(info_line(search_board, result, table)),
+            self.tablebases,
+        )
+        depth = search.MAX_DEPTH
+        if time_limit is None and "nodes" not in options and not waits:
+            depth = search.DEFAULT_DEPTH
+        depth = min(options.get("depth", depth), search.MAX_DEPTH)
+        self.search_task = asyncio.create_task(self.search(self.searcher, depth))
+
+    async def search(self, searcher: search.Search, depth: int) -> None:
+        assert self.loop
+        try:
+            result = await self.loop.run_in_executor(None, searcher.iterate, depth)
+        except Exception as error:
+            # a search that fails still has to answer, or the GUI waits for it forever
+            self.write(f"info string search failed: {error!r}")
+            await self.release.wait()
+            self.write("bestmove 0000")
+            return
+        # "go infinite" and "go ponder" only give their move after "stop" or "ponderhit"
+        await self.release.wait()
+        if not result.move:
+            self.write("bestmove 0000")
+            return
+        line = f"bestmove {board.move_name(result.move)}"
+        if len(result.pv) > 1:
+            search_board = searcher.board
+            undo = search_board.push(result.move)
+            line += f" ponder {board.move_name(result.pv[1])}"
+            search_board.pop(undo)
+        self.write(line)
+
+    def ponderhit(self) -> None:
+        """The opponent played the move that was pondered on, so switch to a normal search.
+
+        The clock of the engine only starts now, so the search gets the whole time allotted by
+        the "go ponder" command from this point on and the time spent pondering is free.
+        """
+        if not self.pondering or not self.searcher:
+            return
+        self.pondering = False
+        if self.ponder_limit is not None:
+            # time_limit counts from the start of the search, which began when pondering did
+            self.searcher.time_limit = (
+                time.perf_counter() - self.searcher.start + self.ponder_limit
+            )
+        self.release.set()
+
+    async def stop(self) -> None:
+        """Stop the search if there is one and wait for its bestmove."""
+        if not self.search_task:
+            return
+        self.stop_event.set()
+        self.release.set()
+        try:
+            await self.search_task
+        except Exception as error:
+            self.write(f"info string search failed: {error!r}")
+        self.search_task = None
+        self.searcher = None
+        self.pondering = False
+
+
+def main() -> int:
+    asyncio.run(UCIEngine().run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
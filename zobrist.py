@@ -0,0 +1,64 @@
+import random
+from typing import Union
+import pieces
+from chess_types import ColourString, File, Rank, SymbolString
+
+# Seeded so a position has the same key in every run and every process.
+_random = random.Random(0xFACE)
+
+# Random 64 bit numbers indexed by colour and symbol, then file and rank like the board.
+PIECE_KEYS: dict[tuple[ColourString, SymbolString], list[list[int]]] = {
+    (colour, symbol): [[_random.getrandbits(64) for _ in range(9)] for _ in range(8)]
+    for colour in ("w", "b")
+    for symbol in ("P", "N", "B", "R", "Q", "K")
+}
+SIDE_KEY = _random.getrandbits(64)
+# In the same order as the flags in Undo.castling:
+# white close, white far, black close, black far.
+CASTLING_KEYS = tuple(_random.getrandbits(64) for _ in range(4))
+EN_PASSANT_KEYS = tuple(_random.getrandbits(64) for _ in range(8))
+
+
+def piece_key(piece: pieces.ChessPiece) -> int:
+    """Return the key of a piece standing on its square."""
+    return PIECE_KEYS[(piece.colour, piece.symbol)][piece.file][piece.rank]
+
+
+def castling_key(castling: tuple[bool, bool, bool, bool]) -> int:
+    """Return the key of a set of castling flags."""
+    key = 0
+    for flag, flag_key in zip(castling, CASTLING_KEYS):
+        if flag:
+            key ^= flag_key
+    return key
+
+
+def en_passant_key(en_passant: Union[None, tuple[File, Rank]]) -> int:
+    """Return the key of an en passant square, which only depends on its file."""
+    return EN_PASSANT_KEYS[en_passant[0]] if en_passant else 0
+
+
+def compute_key(board: pieces.BaseBoard) -> int:
+    """Return the Zobrist key of a board from scratch.
+
+    This is the XOR of the keys of every piece on its square,
+    the castling flags of both kings, the en passant file and SIDE_KEY if it is black's turn.
+    Boards keep their "key" up to date as moves are made, this is for setting it up.
+    """
+
+    key = 0
+    for piece in board.pieces:
+        key ^= piece_key(piece)
+    flags = []
+    for colour in ("w", "b"):
+        king = board.get_piece(
+            {"colour": colour, "symbol": "K", "file": None, "rank": None}
+        )
+        castle_close = isinstance(king, pieces.King) and king.castle_close
+        castle_far = isinstance(king, pieces.King) and king.castle_far
+        flags += [castle_close, castle_far]
+    key ^= castling_key((flags[0], flags[1], flags[2], flags[3]))
+    key ^= en_passant_key(board.en_passant)
+    if board.turn == "b":
+        key ^= SIDE_KEY
+    return key